@@ -0,0 +1,360 @@
+# Cohort analytics over a columnar snapshot of assessments
+# A background job decodes each assessment's JSON answers once into small
+# integer codes and appends them to one flat binary file per column. Readers
+# memory-map those files, so the doctor analytics views are a few vectorized
+# NumPy operations over the whole population instead of a JSON parse per row.
+# The row count in meta.json is written last; anything past it (a run that
+# died mid-append) is ignored by readers and truncated by the next run. A
+# rebuild starts a new generation of files rather than truncating mapped ones.
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from run_lock import acquire_run_lock
+
+try:
+    import numpy as np
+except ImportError:  # Analytics are disabled without NumPy
+    np = None
+
+ANALYTICS_DIR = os.environ.get('ANALYTICS_DIR', 'analytics')
+ANALYTICS_INTERVAL = int(os.environ.get('ANALYTICS_INTERVAL', 3600))      # Seconds between snapshot updates
+ANALYTICS_CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE', 5000))  # Assessments decoded per query
+
+RISK_LEVELS = ['Low Risk', 'Moderate Risk', 'High Risk']
+WELLNESS_LEVELS = ['Low Wellness', 'Moderate Wellness', 'High Wellness']
+SOCIAL_ENGAGEMENT = ['None', 'Rarely', 'Often']
+WELLNESS_SCALE = (1, 5)  # sleep_quality and mood_level answers
+MISSING = -1
+ANALYTICS_ENABLED = np is not None
+
+# Columns every snapshot has; one int8 column per risk factor is added to these
+BASE_COLUMNS = {
+    'id': 'int64',
+    'user_id': 'int64',
+    'created_at': 'int64',  # Seconds since 1970-01-01, wall-clock time as stored
+    'risk_score': 'int16',
+    'wellness_score': 'int16',
+    'risk_level': 'int8',
+    'wellness_level': 'int8',
+    'sleep_quality': 'int8',
+    'mood_level': 'int8',
+    'social_engagement': 'int8',
+}
+
+
+def _code(vocabulary, value):
+    try:
+        return vocabulary.index(value)
+    except ValueError:
+        return MISSING
+
+
+def _scale_answer(value):
+    """A 1-5 wellness answer, or MISSING for anything outside the scale"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return MISSING
+    low, high = WELLNESS_SCALE
+    return value if low <= value <= high else MISSING
+
+
+def _fit(values, dtype):
+    """Values that do not fit the column's integer type become MISSING instead of failing the run"""
+    info = np.iinfo(dtype)
+    return [value if info.min <= value <= info.max else MISSING for value in values]
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(value):
+    """Naive timestamp -> seconds since 1970-01-01 of the same wall-clock time"""
+    # SQLite returns timestamps as text, PostgreSQL as datetimes
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return int((value.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+class CohortSnapshot:
+    """Append-only columnar files for assessments, plus their memory-mapped view"""
+
+    def __init__(self, risk_factors, directory=ANALYTICS_DIR):
+        self.directory = directory
+        # Answers are coded by their position in RISK_FACTORS, which runs from least to most severe
+        self.vocabulary = {factor: list(answers) for factor, answers in risk_factors.items()}
+        self.columns = dict(BASE_COLUMNS, **{factor: 'int8' for factor in self.vocabulary})
+        self._view = None
+        self._view_key = None
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _column_path(self, name, generation):
+        return self._path(f'{name}.{generation}.bin')
+
+    def read_meta(self):
+        try:
+            with open(self._path('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp = self._path('meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path('meta.json'))
+
+    def _empty_meta(self, generation=0):
+        return {'generation': generation, 'rows': 0, 'last_id': 0, 'vocabulary': self.vocabulary,
+                'updated_at': None}
+
+    def decode(self, row):
+        """One assessment row -> tuple of column values in self.columns order"""
+        try:
+            answers = json.loads(row['assessment_data'] or '{}')
+        except ValueError:
+            answers = {}
+        wellness = answers.get('wellness') or {}
+        values = {
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'created_at': _epoch_seconds(row['created_at']),
+            'risk_score': row['risk_score'],
+            'wellness_score': row['wellness_score'] if row['wellness_score'] is not None else MISSING,
+            'risk_level': _code(RISK_LEVELS, row['risk_level']),
+            'wellness_level': _code(WELLNESS_LEVELS, row['wellness_level']),
+            'sleep_quality': _scale_answer(wellness.get('sleep_quality')),
+            'mood_level': _scale_answer(wellness.get('mood_level')),
+            'social_engagement': _code(SOCIAL_ENGAGEMENT, wellness.get('social_engagement')),
+        }
+        for factor, answers_list in self.vocabulary.items():
+            values[factor] = _code(answers_list, answers.get(factor))
+        return tuple(values[name] for name in self.columns)
+
+    def append(self, db, chunk_size=ANALYTICS_CHUNK_SIZE, rebuild=False):
+        """Add assessments newer than the snapshot; returns how many rows were appended"""
+        os.makedirs(self.directory, exist_ok=True)
+        meta = self.read_meta()
+        reset = rebuild or meta is None or meta.get('vocabulary') != self.vocabulary
+        if reset:
+            meta = self._empty_meta(meta['generation'] + 1 if meta else 0)
+        generation = meta['generation']
+
+        # Drop anything written after the last committed row count
+        for name, dtype in self.columns.items():
+            with open(self._column_path(name, generation), 'ab') as f:
+                f.truncate(meta['rows'] * np.dtype(dtype).itemsize)
+
+        appended = 0
+        while True:
+            rows = db.execute('''
+                SELECT id, user_id, risk_score, risk_level, wellness_score, wellness_level,
+                       assessment_data, created_at
+                FROM assessments
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (meta['last_id'], chunk_size)).fetchall()
+            if not rows:
+                break
+
+            decoded = list(zip(*(self.decode(row) for row in rows)))
+            for (name, dtype), values in zip(self.columns.items(), decoded):
+                with open(self._column_path(name, generation), 'ab') as f:
+                    # One stored out-of-range answer would otherwise stop every later run at this chunk
+                    f.write(np.asarray(_fit(values, dtype), dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            meta['rows'] += len(rows)
+            meta['last_id'] = rows[-1]['id']
+            meta['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self._write_meta(meta)
+            appended += len(rows)
+            if len(rows) < chunk_size:
+                break
+
+        if reset:
+            if not appended:
+                self._write_meta(meta)
+            # Readers that still map an old generation keep it until they remap
+            for filename in os.listdir(self.directory):
+                if filename.endswith('.bin') and not filename.endswith(f'.{generation}.bin'):
+                    os.remove(self._path(filename))
+        return appended
+
+    def load(self):
+        """Memory-mapped columns for the committed rows, remapped when the snapshot grows"""
+        try:
+            stat = os.stat(self._path('meta.json'))
+        except OSError:
+            return None, None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._view_key != key:
+                meta = self.read_meta()
+                if meta is None:
+                    return None, None
+                count = meta['rows']
+                columns = {}
+                for name, dtype in self.columns.items():
+                    if count:
+                        columns[name] = np.memmap(self._column_path(name, meta['generation']),
+                                                  dtype=dtype, mode='r', shape=(count,))
+                    else:
+                        columns[name] = np.zeros(0, dtype=dtype)
+                self._view = (columns, meta)
+                self._view_key = key
+            return self._view
+
+
+def _select(columns, since=None, until=None, latest=False):
+    """Row indexes matching a date range, optionally only each patient's latest assessment"""
+    created = columns['created_at']
+    mask = np.ones(len(created), dtype=bool)
+    if since is not None:
+        mask &= created >= _epoch_seconds(since)
+    if until is not None:
+        mask &= created < _epoch_seconds(until)
+    rows = np.flatnonzero(mask)
+    if latest and len(rows):
+        # Rows are in id order, so the last occurrence of a user is their latest assessment
+        users = columns['user_id'][rows][::-1]
+        _, first = np.unique(users, return_index=True)
+        rows = np.sort(rows[len(rows) - 1 - first])
+    return rows
+
+
+def _rounded(values, digits=3):
+    return [None if not np.isfinite(v) else round(float(v), digits) for v in values]
+
+
+def summary_view(columns, rows, snapshot):
+    risk = columns['risk_score'][rows]
+    level = columns['risk_level'][rows]
+    levels = np.bincount(level[level >= 0], minlength=len(RISK_LEVELS))
+    return {
+        'assessments': int(len(rows)),
+        'patients': int(len(np.unique(columns['user_id'][rows]))),
+        'mean_risk_score': _rounded([risk.mean()])[0] if len(rows) else None,
+        'risk_levels': dict(zip(RISK_LEVELS, levels[:len(RISK_LEVELS)].tolist())),
+    }
+
+
+def risk_by_age_view(columns, rows, snapshot):
+    """Count of each risk level per age group"""
+    ages = snapshot.vocabulary.get('age_group', [])
+    age = columns['age_group'][rows]
+    level = columns['risk_level'][rows]
+    keep = (age >= 0) & (level >= 0)
+    cells = np.bincount(age[keep].astype(np.int64) * len(RISK_LEVELS) + level[keep],
+                        minlength=len(ages) * len(RISK_LEVELS)).reshape(len(ages), len(RISK_LEVELS))
+    return {age_group: dict(zip(RISK_LEVELS, counts.tolist())) for age_group, counts in zip(ages, cells)}
+
+
+def correlations_view(columns, rows, snapshot):
+    """Pearson correlations between factor codes, scores and wellness answers"""
+    names = list(snapshot.vocabulary) + ['risk_score', 'wellness_score', 'sleep_quality', 'mood_level']
+    matrix = np.stack([columns[name][rows].astype(np.float64) for name in names])
+    complete = (matrix >= 0).all(axis=0)  # Answers coded MISSING are left out
+    matrix = matrix[:, complete]
+    if matrix.shape[1] < 2:
+        return {'variables': names, 'rows': int(matrix.shape[1]), 'matrix': None}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.corrcoef(matrix)
+    return {'variables': names, 'rows': int(matrix.shape[1]), 'matrix': [_rounded(line) for line in corr]}
+
+
+def mood_vs_risk_view(columns, rows, snapshot):
+    """Monthly mean risk score and self-reported mood level"""
+    if not len(rows):
+        return []
+    months = columns['created_at'][rows].astype('datetime64[s]').astype('datetime64[M]')
+    labels, index = np.unique(months, return_inverse=True)
+    counts = np.bincount(index)
+    risk = np.bincount(index, weights=columns['risk_score'][rows]) / counts
+    mood = columns['mood_level'][rows]
+    has_mood = mood >= 0
+    mood_counts = np.bincount(index[has_mood], minlength=len(labels))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mood_mean = np.bincount(index[has_mood], weights=mood[has_mood], minlength=len(labels)) / mood_counts
+    return [
+        {'month': str(label), 'assessments': int(count), 'mean_risk_score': r, 'mean_mood_level': m}
+        for label, count, r, m in zip(labels, counts, _rounded(risk), _rounded(mood_mean))
+    ]
+
+
+ANALYTICS_VIEWS = {
+    'summary': summary_view,
+    'risk_by_age': risk_by_age_view,
+    'correlations': correlations_view,
+    'mood_vs_risk': mood_vs_risk_view,
+}
+
+
+def query_snapshot(snapshot, view, since=None, until=None, latest=False):
+    """Answer one of ANALYTICS_VIEWS from the snapshot; returns None when no snapshot exists yet"""
+    columns, meta = snapshot.load()
+    if columns is None:
+        return None
+    rows = _select(columns, since, until, latest)
+    return {
+        'view': view,
+        'snapshot': {'rows': meta['rows'], 'updated_at': meta['updated_at']},
+        'result': ANALYTICS_VIEWS[view](columns, rows, snapshot),
+    }
+
+
+class AnalyticsJob:
+    """Keeps the cohort snapshot up to date, once or periodically in a background thread"""
+
+    def __init__(self, connect, snapshot, interval=ANALYTICS_INTERVAL, chunk_size=ANALYTICS_CHUNK_SIZE):
+        self._connect = connect
+        self.snapshot = snapshot
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, rebuild=False, wait=False):
+        """Append new assessments; returns the row count added, or None if another process is running
+
+        Only one process writes the snapshot at a time; wait=True queues behind a run in progress.
+        """
+        lock_file = acquire_run_lock(self.snapshot.directory, '.analytics.lock', wait)
+        if lock_file is None:
+            return None
+        db = self._connect()
+        try:
+            return self.snapshot.append(db, self.chunk_size, rebuild)
+        finally:
+            db.close()
+            lock_file.close()
+
+    def start(self):
+        if not ANALYTICS_ENABLED or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='analytics-job', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Build the first snapshot right away so the views are not empty until the first interval
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: Analytics snapshot update failed: {e}")
+            if self._stop.wait(self.interval):
+                return
@@ -1,18 +1,19 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, g, has_app_context
 import json
 import os
 import uuid
 from datetime import datetime, timedelta
 import random
 import hashlib
-import sqlite3
-from functools import wraps
+from functools import lru_cache, wraps
 import re
 import threading
 import time
 from collections import defaultdict, deque
 import statistics
 import math
+import atexit
+import click
 
 # Import chatbot knowledge base
 try:
@@ -23,36 +24,153 @@ except ImportError:
     CHATBOT_KEYWORDS = {}
     FALLBACK_RESPONSES = ["I'm here to help with Alzheimer's information. Please ask me a specific question."]
 
+from chat_store import MAX_MESSAGE_LENGTH, ChatHistoryStore
+from search_index import SEARCH_SOURCES, ensure_search_index, search
+from password_pool import PasswordHasher, PasswordPoolBusy
+from static_pages import StaticPages
+from storage import DB_ERRORS, DB_INTEGRITY_ERRORS, Storage
+from rate_limit import RateLimiter
+from retention import (ARCHIVE_PAGE_SIZE, MAX_ARCHIVE_PAGE_SIZE, RETENTION_POLICIES, RetentionJob,
+                       ensure_retention_tables, query_archive)
+
 # Import compatible packages for Python 3.13
-# import googletrans  # For multi-language support - REMOVED due to Python 3.13 compatibility issues
+# Multi-language support uses local phrase tables (translations/) instead of googletrans
+from translator import PhraseTranslator, UnsupportedLanguage
+from scheduling import Scheduler, SlotUnavailable, ensure_scheduling_schema
+from analytics import ANALYTICS_ENABLED, ANALYTICS_VIEWS, AnalyticsJob, CohortSnapshot, query_snapshot
+from resilience import GuardedReads, ReadUnavailable
+from notifications import ReminderJob, ensure_notification_tables, inbox, mark_read, notify, notify_many, unread_count
+from json_codec import Fragment, dumps as encode_json, json_response
 from reportlab.pdfgen import canvas  # For PDF generation
 from reportlab.lib.pagesizes import letter
-from werkzeug.security import generate_password_hash, check_password_hash
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-# Database setup
-DATABASE = 'alzheimer_app.db'
+# Trust X-Forwarded-For from this many proxies. The default of 0 is only right when
+# clients connect directly: behind Render's proxy it leaves every anonymous client
+# with the proxy's address, sharing one rate-limit bucket, so deployments set 1.
+PROXY_HOPS = int(os.environ.get('PROXY_HOPS', 0))
+if PROXY_HOPS:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS)
+
+# Dashboard/assessment shells are rendered once and served pre-compressed
+static_pages = StaticPages(app)
+
+# Token-bucket limits and concurrency caps for the public endpoints
+rate_limiter = RateLimiter(app)
+
+# Database setup: SQLite by default, PostgreSQL when DATABASE_URL is set
+storage = Storage()
 
 def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Pooled connection for the current request, or a fresh one outside a request (caller closes)"""
+    if not has_app_context():
+        return storage.connect()
+    if 'db' not in g:
+        g.db = storage.connect()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exception):
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
+# Dashboard reads get a short timeout and fall back to their last good response when the database is locked
+guarded_reads = GuardedReads(storage.connect)
+
+@app.errorhandler(ReadUnavailable)
+def read_unavailable(e):
+    return jsonify({'error': 'Data is temporarily unavailable, please try again shortly'}), 503, \
+        {'Retry-After': str(e.retry_after)}
+
+def mark_stale(response, age):
+    """Label a response served from the stale cache with how old it is"""
+    if age is not None:
+        response.headers['Age'] = str(int(age))
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
 
 def init_db():
-    with app.app_context():
-        db = get_db()
-        with app.open_resource('schema.sql', mode='r') as f:
-            db.cursor().executescript(f.read())
+    db = storage.connect()
+    try:
+        with app.open_resource(storage.schema_file, mode='r') as f:
+            db.executescript(f.read())
         db.commit()
+    finally:
+        db.close()
+
+def ensure_schema():
+    """Create tables and indexes added after the initial schema on existing databases"""
+    db = storage.connect()
+    try:
+        if db.dialect == 'sqlite':
+            db.executescript('''
+                CREATE TABLE IF NOT EXISTS chatbot_conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    user_message TEXT NOT NULL,
+                    bot_response TEXT NOT NULL,
+                    conversation_context TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_chatbot_conversations_user ON chatbot_conversations (user_id, id);
+            ''')
+            db.commit()
+        ensure_search_index(db)
+        ensure_retention_tables(db)
+        ensure_scheduling_schema(db)
+        ensure_notification_tables(db)
+    finally:
+        db.close()
+
+# Password hashing runs in a bounded process pool instead of the request worker
+password_hasher = PasswordHasher()
+
+# Chat history lives server-side; the session cookie only carries a chat_id
+chat_store = ChatHistoryStore(storage.connect)
+
+# Phrase tables for Hindi, Telugu and Tamil, loaded once
+translator = PhraseTranslator()
+
+# Doctor calendars with an in-memory index of booked slots
+scheduler = Scheduler()
+
+# Overdue check-up and upcoming appointment reminders, written to inboxes in batches
+reminder_job = ReminderJob(storage.connect)
+
+# Old mood/emergency/chatbot rows are rolled up, archived and removed from the hot tables
+retention_job = RetentionJob(storage.connect)
+
+@app.cli.command('compact-logs')
+def compact_logs_command():
+    """Run one data-retention pass over the log tables"""
+    # A server process may be mid-run; wait for it rather than skipping this pass
+    moved = retention_job.run_once(wait=True)
+    for table, count in moved.items():
+        print(f"{table}: {count} rows archived")
+
+@app.cli.command('send-reminders')
+def send_reminders_command():
+    """Write due check-up and appointment reminders to user inboxes"""
+    print(f"{reminder_job.run_once()} reminders sent")
+
+@app.cli.command('build-analytics')
+@click.option('--rebuild', is_flag=True, help='Discard the snapshot and re-extract every assessment')
+def build_analytics_command(rebuild):
+    """Append new assessments to the analytics snapshot"""
+    added = analytics_job.run_once(rebuild=rebuild, wait=True)
+    print(f"{added} assessments added to the analytics snapshot")
 
 @app.route('/reset_db')
 def reset_db():
     """Reset database (for development purposes)"""
-    if os.path.exists(DATABASE):
-        os.remove(DATABASE)
+    storage.reset()
     init_db()
+    ensure_schema()
     return "Database reset successfully"
 
 # Risk factors and scoring
@@ -66,6 +184,10 @@ RISK_FACTORS = {
     'poor_judgment': {'No': 0, 'Yes': 10}
 }
 
+# Columnar snapshot of assessments for the doctor analytics views, refreshed in the background
+cohort_snapshot = CohortSnapshot(RISK_FACTORS)
+analytics_job = AnalyticsJob(storage.connect, cohort_snapshot)
+
 # Causal AI templates for dynamic descriptions
 CAUSAL_TEMPLATES = {
     'memory_loss': {
@@ -148,13 +270,13 @@ def index():
 def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    return render_template('dashboard.html')
+    return static_pages.render('dashboard.html')
 
 @app.route('/assessment')
 def assessment():
     # For demo purposes, allow assessment without login
     # In production, you would require authentication
-    return render_template('assessment.html')
+    return static_pages.render('assessment.html')
 
 @app.route('/calculate_risk', methods=['POST'])
 def calculate_risk():
@@ -212,8 +334,8 @@ def calculate_risk():
     else:
         wellness_level = "High Wellness"
 
-    # Generate causal analysis
-    causal_analysis = generate_causal_analysis(data, risk_score)
+    # Generate causal analysis (already JSON-encoded; the same bytes go to the DB and the response)
+    causal_analysis = encoded_causal_analysis(data, risk_score)
 
     # Store assessment in database (only if user is logged in)
     if 'user_id' in session:
@@ -221,11 +343,16 @@ def calculate_risk():
         db.execute('''
             INSERT INTO assessments (user_id, risk_score, risk_level, wellness_score, wellness_level, assessment_data, causal_analysis)
             VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (session['user_id'], risk_score, risk_level, wellness_score, wellness_level, json.dumps(data), json.dumps(causal_analysis)))
+        ''', (session['user_id'], risk_score, risk_level, wellness_score, wellness_level,
+              encode_json(data).decode('utf-8'), causal_analysis.raw.decode('utf-8')))
+        if risk_level == "High Risk":
+            notify(db, session['user_id'], 'risk',
+                   f'Your latest assessment scored {risk_score}/100 (High Risk). Please consider booking a doctor appointment.',
+                   'high')
         db.commit()
 
     print(f"DEBUG: Sending response: risk_score={risk_score}, wellness_score={wellness_score}")
-    return jsonify({
+    return json_response({
         'risk_score': risk_score,
         'risk_level': risk_level,
         'wellness_score': wellness_score,
@@ -233,6 +360,22 @@ def calculate_risk():
         'causal_analysis': causal_analysis
     })
 
+# Answers a given set of factors always produces the same lines, so they are encoded once
+CAUSAL_INPUT_KEYS = ('memory_loss', 'age_group', 'family_history', 'mood_swings', 'disorientation')
+
+@lru_cache(maxsize=1024)
+def _cached_causal_analysis(inputs):
+    return Fragment.of(generate_causal_analysis(dict(inputs), None))
+
+def encoded_causal_analysis(data, risk_score):
+    """Causal analysis lines as a pre-encoded JSON fragment"""
+    inputs = tuple((key, data[key]) for key in CAUSAL_INPUT_KEYS if key in data)
+    # Only the form's own answers are cached: a cache key treats 1, 1.0 and True as equal,
+    # which would hand one request's lines to another
+    if all(isinstance(value, str) and value in RISK_FACTORS.get(key, ()) for key, value in inputs):
+        return _cached_causal_analysis(inputs)
+    return Fragment.of(generate_causal_analysis(data, risk_score))
+
 def generate_causal_analysis(data, risk_score):
     """Generate dynamic causal analysis based on risk factors"""
     primary_factors = []
@@ -280,6 +423,9 @@ def generate_causal_analysis(data, risk_score):
 
     return causal_lines
 
+# Knowledge-base answers encoded to JSON once at startup
+KNOWLEDGE_BASE_FRAGMENTS = {answer: Fragment.of(answer) for answer in CHATBOT_KNOWLEDGE_BASE.values()}
+
 def get_chatbot_response(user_message):
     """Enhanced rule-based chatbot for Alzheimer's information"""
     if not user_message:
@@ -335,46 +481,39 @@ def get_chatbot_response(user_message):
 def chatbot():
     """Enhanced chatbot endpoint for Alzheimer's information"""
     user_message = request.get_json().get('message', '')
+    if not isinstance(user_message, str) or len(user_message) > MAX_MESSAGE_LENGTH:
+        return jsonify({'error': f'Message must be text of at most {MAX_MESSAGE_LENGTH} characters'}), 400
 
     response = get_chatbot_response(user_message)
-
-    # Store conversation in session for context (optional)
-    if 'chat_history' not in session:
-        session['chat_history'] = []
-
-    # Keep only last 20 messages for context
-    chat_history = session['chat_history']
-    chat_history.append({
-        'user': user_message,
-        'bot': response,
-        'timestamp': datetime.now().strftime('%H:%M')
+    related_queries = get_related_queries(user_message)
+
+    # Keep conversation context server-side; the cookie only holds the chat id
+    session.pop('chat_history', None)
+    chat_id = session.get('chat_id')
+    if not chat_id:
+        chat_id = session['chat_id'] = ChatHistoryStore.new_chat_id()
+
+    # Logged-in users' exchanges are also written to chatbot_conversations in batches
+    chat_store.append(chat_id, user_message, response,
+                      user_id=session.get('user_id'),
+                      context={'related_queries': related_queries})
+
+    # Knowledge-base answers are not in the phrase tables, so they are always English
+    return json_response({
+        'response': KNOWLEDGE_BASE_FRAGMENTS.get(response, response),
+        'related_queries': related_queries,
+        'can_answer': len(CHATBOT_KNOWLEDGE_BASE) > 0,
+        'language': 'en',
+        'translated': False
     })
 
-    if len(chat_history) > 20:
-        chat_history = chat_history[-20:]
-
-    session['chat_history'] = chat_history
-
-    return jsonify({
-        'response': response,
-        'related_queries': get_related_queries(user_message),
-        'can_answer': len(CHATBOT_KNOWLEDGE_BASE) > 0
-    })
-
-    # Optionally store conversation in database for logged-in users
-    if 'user_id' in session:
-        try:
-            db = get_db()
-            db.execute('''
-                INSERT INTO chatbot_conversations (user_id, user_message, bot_response, conversation_context)
-                VALUES (?, ?, ?, ?)
-            ''', (session['user_id'], user_message, response, json.dumps({
-                'related_queries': get_related_queries(user_message),
-                'timestamp': datetime.now().isoformat()
-            })))
-            db.commit()
-        except Exception as e:
-            print(f"Warning: Could not store chatbot conversation: {e}")
+@app.route('/chatbot/history')
+def chatbot_history():
+    """Recent exchanges of the current chatbot conversation, oldest first"""
+    chat_id = session.get('chat_id')
+    if not chat_id:
+        return jsonify({'history': []})
+    return jsonify({'history': chat_store.history(chat_id, session.get('user_id'))})
 
 def get_related_queries(user_message):
     """Suggest related queries based on user input"""
@@ -433,6 +572,12 @@ def anomaly_detection():
                 'severity': 'high' if memory_change > 25 else 'medium'
             })
 
+    if anomalies:
+        db = get_db()
+        notify_many(db, [(session['user_id'], 'anomaly', anomaly['message'], anomaly['severity'], None)
+                         for anomaly in anomalies])
+        db.commit()
+
     return jsonify({'anomalies': anomalies})
 
 @app.route('/predictive_alerts', methods=['POST'])
@@ -485,19 +630,54 @@ def predictive_alerts():
         'urgency': urgency
     })
 
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
 @app.route('/translate', methods=['POST'])
 def translate():
     """Translate text to different languages"""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
     text = data.get('text', '')
     target_lang = data.get('target_lang', 'en')
+    if not isinstance(text, str) or not isinstance(target_lang, str):
+        return jsonify({'error': 'text and target_lang must be strings'}), 400
 
     try:
-        translator = googletrans.Translator()
-        translated = translator.translate(text, dest=target_lang)
-        return jsonify({'translated_text': translated.text})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        translated, found = translator.translate(text, target_lang)
+    except UnsupportedLanguage as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'translated_text': translated, 'translated': found})
+
+@app.route('/translate_batch', methods=['POST'])
+def translate_batch():
+    """Translate a list of strings and/or a whole assessment response in one call"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    target_lang = data.get('target_lang', 'en')
+    if not isinstance(target_lang, str):
+        return jsonify({'error': 'target_lang must be a string'}), 400
+    if 'texts' in data and not _is_string_list(data['texts']):
+        return jsonify({'error': 'texts must be a list of strings'}), 400
+    if 'assessment' in data and not isinstance(data['assessment'], dict):
+        return jsonify({'error': 'assessment must be an object'}), 400
+
+    try:
+        response = {}
+        untranslated = []
+        if 'texts' in data:
+            response['translations'], missing = translator.translate_many(data['texts'], target_lang)
+            untranslated.extend(missing)
+        if 'assessment' in data:
+            response['assessment'], missing = translator.translate_assessment(data['assessment'], target_lang)
+            untranslated.extend(missing)
+    except UnsupportedLanguage as e:
+        return jsonify({'error': str(e)}), 400
+
+    response['untranslated'] = untranslated
+    return jsonify(response)
 
 @app.route('/emergency_contact', methods=['POST'])
 def emergency_contact():
@@ -546,9 +726,9 @@ def mood_tracking():
         # Analyze mood trends
         cursor = db.execute('''
             SELECT mood, COUNT(*) as count FROM mood_logs
-            WHERE user_id = ? AND timestamp >= date('now', '-30 days')
+            WHERE user_id = ? AND timestamp >= ?
             GROUP BY mood
-        ''', (session['user_id'],))
+        ''', (session['user_id'], datetime.now() - timedelta(days=30)))
 
         mood_trends = dict(cursor.fetchall())
 
@@ -565,9 +745,18 @@ def login():
         password = request.form['password']
 
         db = get_db()
-        user = db.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        user = db.execute_prepared('user_by_username', (username,)).fetchone()
 
-        if user and check_password_hash(user['password'], password):
+        try:
+            valid = user is not None and password_hasher.verify(user['password'], password)
+            # Upgrade hashes made with older parameters while we have the plaintext
+            if valid and password_hasher.needs_rehash(user['password']):
+                db.execute('UPDATE users SET password = ? WHERE id = ?', (password_hasher.hash(password), user['id']))
+                db.commit()
+        except PasswordPoolBusy:
+            return render_template('login.html', error='Server is busy, please try again in a moment'), 503, {'Retry-After': '2'}
+
+        if valid:
             session['user_id'] = user['id']
             session['username'] = user['username']
             session['user_type'] = user['user_type']
@@ -594,17 +783,24 @@ def doctor_patients():
     if 'user_id' not in session or session.get('user_type') != 'doctor':
         return jsonify({'error': 'Unauthorized'}), 401
 
-    db = get_db()
+    patients_data, age = guarded_reads.fetch(('doctor_patients',), load_doctor_patients, get_db)
+    return mark_stale(jsonify(patients_data), age)
 
-    # Get all patients with their recent assessments
+def load_doctor_patients(db):
+    """Rows for /doctor_patients"""
+    # Get all patients with their most recent assessment and assessment count
     patients = db.execute('''
         SELECT u.id, u.username, u.email,
                a.risk_score, a.risk_level, a.wellness_score, a.wellness_level, a.created_at as last_assessment,
-               COUNT(a.id) as total_assessments
+               (SELECT COUNT(*) FROM assessments c WHERE c.user_id = u.id) as total_assessments
         FROM users u
-        LEFT JOIN assessments a ON u.id = a.user_id
+        LEFT JOIN assessments a ON a.id = (
+            SELECT id FROM assessments latest
+            WHERE latest.user_id = u.id
+            ORDER BY latest.created_at DESC, latest.id DESC
+            LIMIT 1
+        )
         WHERE u.user_type = 'patient'
-        GROUP BY u.id, u.username, u.email
         ORDER BY a.created_at DESC
     ''').fetchall()
 
@@ -614,7 +810,7 @@ def doctor_patients():
         patient_dict['last_assessment'] = patient['last_assessment'] or 'No assessments'
         patients_data.append(patient_dict)
 
-    return jsonify(patients_data)
+    return patients_data
 
 @app.route('/doctor_appointments')
 def doctor_appointments():
@@ -622,18 +818,58 @@ def doctor_appointments():
     if 'user_id' not in session or session.get('user_type') != 'doctor':
         return jsonify({'error': 'Unauthorized'}), 401
 
-    db = get_db()
+    doctor_id = session['user_id']
+    appointments, age = guarded_reads.fetch(('doctor_appointments', doctor_id),
+                                            lambda db: load_doctor_appointments(db, doctor_id), get_db)
+    return mark_stale(jsonify(appointments), age)
 
+def load_doctor_appointments(db, doctor_id):
+    """Rows for /doctor_appointments"""
+    # Requests booked with this doctor plus unassigned requests any doctor can take
     appointments = db.execute('''
         SELECT a.*, u.username as patient_name, u.email as patient_email
         FROM appointments a
         JOIN users u ON a.user_id = u.id
-        WHERE a.status = 'pending'
+        WHERE a.status = 'pending' AND (a.doctor_id = ? OR a.doctor_id IS NULL)
         ORDER BY a.created_at DESC
-    ''').fetchall()
+    ''', (doctor_id,)).fetchall()
+
+    return [dict(appointment) for appointment in appointments]
+
+@app.route('/doctor_today_appointments')
+def doctor_today_appointments():
+    """Get the doctor's appointments for today"""
+    if 'user_id' not in session or session.get('user_type') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    db = get_db()
+
+    appointments = db.execute('''
+        SELECT a.*, u.username as patient_name, u.email as patient_email
+        FROM appointments a
+        JOIN users u ON a.user_id = u.id
+        WHERE a.doctor_id = ? AND a.preferred_date = ? AND a.status IN ('pending', 'approved', 'confirmed')
+        ORDER BY a.start_time, a.created_at
+    ''', (session['user_id'], datetime.now().date().isoformat())).fetchall()
 
     return jsonify([dict(appointment) for appointment in appointments])
 
+@app.route('/doctor/availability', methods=['GET', 'POST'])
+def doctor_availability():
+    """Read or replace the logged-in doctor's weekly availability windows"""
+    if 'user_id' not in session or session.get('user_type') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    db = get_db()
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        try:
+            scheduler.set_availability(db, session['user_id'], data.get('windows', []))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid availability: {e}'}), 400
+
+    return jsonify(scheduler.availability(db, session['user_id']))
+
 @app.route('/update_appointment_status', methods=['POST'])
 def update_appointment_status():
     """Allow doctors to approve/reject appointments"""
@@ -649,13 +885,102 @@ def update_appointment_status():
 
     try:
         db = get_db()
-        db.execute('UPDATE appointments SET status = ? WHERE id = ?', (status, appointment_id))
+        appointment = db.execute('''
+            SELECT user_id, doctor_id, appointment_type, preferred_date, start_time, status
+            FROM appointments WHERE id = ?
+        ''', (appointment_id,)).fetchone()
+        if appointment is None or appointment['doctor_id'] not in (None, session['user_id']):
+            return jsonify({'error': 'Appointment not found'}), 404
+        if appointment['status'] != 'pending':
+            return jsonify({'error': f"Appointment is already {appointment['status']}"}), 409
+
+        # Unassigned requests belong to the doctor who answers them; the status check
+        # in the WHERE clause keeps two concurrent answers from both applying
+        try:
+            updated = db.execute('UPDATE appointments SET status = ?, doctor_id = ? WHERE id = ? AND status = ?',
+                                 (status, session['user_id'], appointment_id, 'pending')).rowcount
+        except DB_INTEGRITY_ERRORS:
+            db.rollback()
+            return jsonify({'error': 'You already have an appointment at that time'}), 409
+        if not updated:
+            db.rollback()
+            return jsonify({'error': 'Appointment was already answered'}), 409
+        when = str(appointment['start_time'] or appointment['preferred_date'])[:16]
+        notify(db, appointment['user_id'], 'appointment',
+               f"Your {appointment['appointment_type']} appointment on {when} was {status} by Dr. {session.get('username')}",
+               'high' if status == 'rejected' else 'medium')
         db.commit()
+        if status == 'rejected' and appointment['doctor_id'] is not None:
+            scheduler.release(appointment['doctor_id'], appointment['start_time'])
+        elif status == 'approved' and appointment['doctor_id'] is None and appointment['start_time'] is not None:
+            # A timed request just joined this doctor's calendar
+            scheduler.invalidate(session['user_id'])
 
         return jsonify({'success': True, 'message': f'Appointment {status} successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/search')
+def search_records():
+    """Full-text search over chatbot conversations and mood/appointment notes for doctors"""
+    if 'user_id' not in session or session.get('user_type') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+
+    sources = request.args.get('sources')
+    sources = sources.split(',') if sources else list(SEARCH_SOURCES)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+    db = get_db()
+    try:
+        return jsonify(search(db, query, sources, page, per_page))
+    except DB_ERRORS as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/doctor/archive')
+def doctor_archive():
+    """Read a page of archived log rows for a table and month (YYYY-MM); pass next_cursor back as `after`"""
+    if 'user_id' not in session or session.get('user_type') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    table = request.args.get('table')
+    month = request.args.get('month', '')
+    user_id = request.args.get('user_id', type=int)
+    after = request.args.get('after', type=int)
+    limit = min(max(request.args.get('limit', ARCHIVE_PAGE_SIZE, type=int), 1), MAX_ARCHIVE_PAGE_SIZE)
+    if table not in RETENTION_POLICIES or not re.fullmatch(r'\d{4}-\d{2}', month):
+        return jsonify({'error': 'A valid table and month (YYYY-MM) are required'}), 400
+
+    rows, next_cursor = query_archive(table, month, user_id, after, limit)
+    return jsonify({'rows': rows, 'next_cursor': next_cursor})
+
+@app.route('/doctor/analytics')
+def doctor_analytics():
+    """Population views over the assessment snapshot (summary, risk_by_age, correlations, mood_vs_risk)"""
+    if 'user_id' not in session or session.get('user_type') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+    if not ANALYTICS_ENABLED:
+        return jsonify({'error': 'Analytics require NumPy'}), 503
+
+    view = request.args.get('view', 'summary')
+    if view not in ANALYTICS_VIEWS:
+        return jsonify({'error': f"Unknown view; choose one of {', '.join(ANALYTICS_VIEWS)}"}), 400
+    try:
+        since = datetime.strptime(request.args['since'], '%Y-%m-%d') if request.args.get('since') else None
+        until = datetime.strptime(request.args['until'], '%Y-%m-%d') if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    latest = request.args.get('latest') in ('1', 'true')
+
+    result = query_snapshot(cohort_snapshot, view, since, until, latest)
+    if result is None:
+        return jsonify({'error': 'Analytics snapshot is still being built'}), 503, {'Retry-After': '30'}
+    return jsonify(result)
+
 @app.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -674,8 +999,11 @@ def register():
     if existing_user:
         return jsonify({'error': 'Username or email already exists'}), 400
 
-    # Hash password using pbkdf2:sha256 method (compatible with Werkzeug)
-    hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+    # Hash password with the configured Werkzeug method in the hashing pool
+    try:
+        hashed_password = password_hasher.hash(password)
+    except PasswordPoolBusy:
+        return jsonify({'error': 'Server is busy, please try again in a moment'}), 503, {'Retry-After': '2'}
 
     # Insert new user
     db.execute('''
@@ -693,81 +1021,66 @@ def dashboard_data():
         return jsonify({'error': 'Not authenticated'}), 401
 
     user_id = session['user_id']
-    db = get_db()
+    username = session.get('username', 'User')
+    dashboard_info, age = guarded_reads.fetch(('dashboard_data', user_id),
+                                              lambda db: load_dashboard_data(db, user_id, username), get_db)
+    return mark_stale(json_response(dashboard_info), age)
 
-    # Get latest assessment
-    latest_assessment = db.execute('''
-        SELECT risk_score, risk_level, wellness_score, wellness_level, created_at
-        FROM assessments
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-        LIMIT 1
-    ''', (user_id,)).fetchone()
-
-    # Get recent assessments (last 5)
-    recent_assessments = db.execute('''
-        SELECT risk_score, risk_level, wellness_score, wellness_level, created_at
-        FROM assessments
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-        LIMIT 5
-    ''', (user_id,)).fetchall()
+def load_dashboard_data(db, user_id, username):
+    """Payload for /dashboard_data"""
+    # Get recent assessments (last 5); the first one is the latest
+    recent_assessments = db.execute_prepared('recent_assessments', (user_id, 5)).fetchall()
+    latest_assessment = recent_assessments[0] if recent_assessments else None
 
     # Get mood trends (last 30 days)
-    mood_trends = db.execute('''
-        SELECT mood, COUNT(*) as count
-        FROM mood_logs
-        WHERE user_id = ? AND timestamp >= date('now', '-30 days')
-        GROUP BY mood
-        ORDER BY count DESC
-    ''', (user_id,)).fetchall()
+    mood_trends = db.execute_prepared('mood_trends', (user_id, datetime.now() - timedelta(days=30))).fetchall()
 
     # Get recent mood logs (last 7 days)
-    recent_moods = db.execute('''
-        SELECT mood, notes, timestamp
-        FROM mood_logs
-        WHERE user_id = ?
-        ORDER BY timestamp DESC
-        LIMIT 7
-    ''', (user_id,)).fetchall()
+    recent_moods = db.execute_prepared('recent_moods', (user_id, 7)).fetchall()
 
     # Format data for frontend
     dashboard_info = {
+        'username': username,
         'latest_assessment': dict(latest_assessment) if latest_assessment else None,
         'recent_assessments': [dict(assessment) for assessment in recent_assessments],
         'mood_trends': {mood['mood']: mood['count'] for mood in mood_trends},
         'recent_moods': [dict(mood) for mood in recent_moods]
     }
 
-    return jsonify(dashboard_info)
+    return dashboard_info
 
 @app.route('/get_notifications')
 def get_notifications():
-    """Get user notifications"""
+    """Get a page of the user's inbox, newest first; pass next_cursor back as `before` for older items"""
     if 'user_id' not in session:
-        return jsonify([])
+        return jsonify({'notifications': [], 'unread_count': 0, 'next_cursor': None})
+
+    before = request.args.get('before', type=int)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    db = get_db()
+    notifications, next_cursor = inbox(db, session['user_id'], before, limit)
+
+    return jsonify({
+        'notifications': notifications,
+        'unread_count': unread_count(db, session['user_id']),
+        'next_cursor': next_cursor
+    })
 
-    # In a real app, these would be dynamic based on user data and schedules
-    notifications = [
-        {
-            'type': 'appointment',
-            'icon': 'exclamation-triangle text-warning',
-            'message': 'Schedule your monthly check-up',
-            'priority': 'medium'
-        },
-        {
-            'type': 'tips',
-            'icon': 'info-circle text-info',
-            'message': 'New wellness tips available',
-            'priority': 'low'
-        },
-        {
-            'type': 'training',
-            'icon': 'calendar text-success',
-            'message': 'Memory training session tomorrow',
-            'priority': 'high'
-        }
-    ]
+@app.route('/notifications/read', methods=['POST'])
+def read_notifications():
+    """Mark the user's notifications up to an id as read"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    data = request.get_json() or {}
+    up_to = data.get('up_to')
+    if not isinstance(up_to, int):
+        return jsonify({'error': 'up_to must be a notification id'}), 400
+
+    db = get_db()
+    marked = mark_read(db, session['user_id'], up_to)
+    return jsonify({'success': True, 'marked': marked, 'unread_count': unread_count(db, session['user_id'])})
 
 @app.route('/schedule_appointment', methods=['POST'])
 def schedule_appointment():
@@ -779,13 +1092,46 @@ def schedule_appointment():
     appointment_type = data.get('appointment_type')
     preferred_date = data.get('preferred_date')
     notes = data.get('notes', '')
+    doctor_id = data.get('doctor_id')
+    start_time = data.get('start_time')
+
+    # Booking a specific slot with a doctor
+    if doctor_id is not None:
+        if not all([appointment_type, start_time]):
+            return jsonify({'error': 'Appointment type and start time are required'}), 400
+        try:
+            doctor_id = int(doctor_id)
+            start = datetime.fromisoformat(start_time)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid doctor or start time'}), 400
 
+        db = get_db()
+        doctor = db.execute("SELECT id FROM users WHERE id = ? AND user_type = 'doctor'", (doctor_id,)).fetchone()
+        if doctor is None:
+            return jsonify({'error': 'Doctor not found'}), 404
+
+        try:
+            appointment_id, start, end = scheduler.book(db, session['user_id'], doctor_id, start,
+                                                        appointment_type, notes)
+        except SlotUnavailable as e:
+            next_slot = e.next_slot.isoformat(timespec='minutes') if e.next_slot else None
+            return jsonify({'error': str(e), 'next_available': next_slot}), 409
+
+        return jsonify({
+            'success': True,
+            'message': 'Appointment booked successfully',
+            'appointment_id': appointment_id,
+            'start_time': start.isoformat(timespec='minutes'),
+            'end_time': end.isoformat(timespec='minutes')
+        })
+
+    # Open request for any doctor on a preferred date
     if not all([appointment_type, preferred_date]):
         return jsonify({'error': 'Appointment type and date are required'}), 400
 
     try:
         db = get_db()
-        db.execute('''
+        appointment_id = db.insert('''
             INSERT INTO appointments (user_id, appointment_type, preferred_date, notes)
             VALUES (?, ?, ?, ?)
         ''', (session['user_id'], appointment_type, preferred_date, notes))
@@ -794,11 +1140,56 @@ def schedule_appointment():
         return jsonify({
             'success': True,
             'message': 'Appointment request submitted successfully',
-            'appointment_id': 'generated_id_here'  # In real app, return actual ID
+            'appointment_id': appointment_id
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/doctors')
+def list_doctors():
+    """Doctors a patient can book with"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    db = get_db()
+    doctors = db.execute('''
+        SELECT id, username FROM users
+        WHERE user_type = 'doctor'
+        ORDER BY username
+    ''').fetchall()
+
+    return jsonify([dict(doctor) for doctor in doctors])
+
+@app.route('/doctors/<int:doctor_id>/slots')
+def doctor_slots(doctor_id):
+    """Free slots for a doctor on a day (YYYY-MM-DD, default today)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    try:
+        day = datetime.strptime(request.args.get('date') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Date must be YYYY-MM-DD'}), 400
+
+    slots = scheduler.free_slots(get_db(), doctor_id, day)
+    return jsonify([slot.isoformat(timespec='minutes') for slot in slots])
+
+@app.route('/doctors/<int:doctor_id>/next_slot')
+def doctor_next_slot(doctor_id):
+    """First free slot for a doctor, optionally after a given time"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    after = request.args.get('after')
+    try:
+        after = datetime.fromisoformat(after) if after else None
+    except ValueError:
+        return jsonify({'error': 'Invalid time'}), 400
+
+    slot = scheduler.next_free_slot(get_db(), doctor_id, after)
+    return jsonify({'next_available': slot.isoformat(timespec='minutes') if slot else None})
+
+@app.route('/user_appointments')
 @app.route('/get_user_appointments')
 def get_user_appointments():
     """Get user's appointments"""
@@ -809,19 +1200,50 @@ def get_user_appointments():
     db = get_db()
 
     appointments = db.execute('''
-        SELECT * FROM appointments
-        WHERE user_id = ?
-        ORDER BY preferred_date DESC
+        SELECT a.*, d.username as doctor_name
+        FROM appointments a
+        LEFT JOIN users d ON a.doctor_id = d.id
+        WHERE a.user_id = ?
+        ORDER BY a.preferred_date DESC, a.start_time DESC
         LIMIT 10
     ''', (user_id,)).fetchall()
 
+    return jsonify([dict(appointment) for appointment in appointments])
+
 @app.route('/logout')
 def logout():
     session.pop('user_id', None)
     session.pop('user_type', None)
+    chat_id = session.pop('chat_id', None)
+    if chat_id:
+        chat_store.drop(chat_id)
     return redirect(url_for('index'))
 
+_background_jobs_started = False
+_background_jobs_lock = threading.Lock()
+
+@app.before_request
+def start_background_jobs():
+    """Start the periodic jobs in the first process that serves a request
+
+    Importing the app does not start them, so `flask` CLI commands and processes
+    that only import this module (the hashing pool's) never run the jobs.
+    """
+    global _background_jobs_started
+    if _background_jobs_started:
+        return
+    with _background_jobs_lock:
+        if _background_jobs_started:
+            return
+        for job in (chat_store, retention_job, reminder_job, analytics_job, guarded_reads):
+            job.start()
+            atexit.register(job.stop)
+        _background_jobs_started = True
+
+if not storage.is_initialized():
+    init_db()
+ensure_schema()
+atexit.register(password_hasher.shutdown)
+
 if __name__ == '__main__':
-    if not os.path.exists(DATABASE):
-        init_db()
     app.run(debug=True)
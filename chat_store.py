@@ -0,0 +1,186 @@
+# Server-side chatbot conversation store
+# Keeps a small ring buffer of recent exchanges per conversation in memory,
+# served by /chatbot/history, and writes logged-in users' exchanges to
+# chatbot_conversations in batches, so the session cookie only needs to carry
+# a conversation id.
+
+import json
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+CHAT_HISTORY_LIMIT = 20        # Exchanges kept per conversation
+MAX_CONVERSATIONS = 10000      # Conversations kept in memory before evicting the oldest
+MAX_BUFFERED_CHARS = 8000000   # Message text kept in memory across all conversations
+MAX_MESSAGE_LENGTH = 1000      # Longest user message /chatbot accepts
+FLUSH_BATCH_SIZE = 25          # Pending rows that trigger a write
+FLUSH_INTERVAL = 5.0           # Seconds between background flushes
+MAX_PENDING_ROWS = 10000       # Unwritten rows kept while the database is unreachable
+
+
+def _exchange_size(exchange):
+    return len(exchange['user']) + len(exchange['bot'])
+
+
+class ChatHistoryStore:
+    """Bounded in-memory chat history with batched persistence"""
+
+    def __init__(self, connect, history_limit=CHAT_HISTORY_LIMIT, max_conversations=MAX_CONVERSATIONS,
+                 max_chars=MAX_BUFFERED_CHARS, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_pending=MAX_PENDING_ROWS):
+        self._connect = connect
+        self.history_limit = history_limit
+        self.max_conversations = max_conversations
+        self.max_chars = max_chars
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._conversations = OrderedDict()  # chat_id -> deque of exchanges
+        self._chars = 0                      # Message text held across all ring buffers
+        self._pending = []                   # Rows waiting to be written
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def new_chat_id():
+        return uuid.uuid4().hex
+
+    def _push(self, chat_id, exchanges):
+        """Append exchanges to a conversation's ring buffer and evict the oldest
+        conversations beyond the count and size limits; caller holds self._lock"""
+        history = self._conversations.get(chat_id)
+        if history is None:
+            history = self._conversations[chat_id] = deque(maxlen=self.history_limit)
+        else:
+            self._conversations.move_to_end(chat_id)
+        for exchange in exchanges:
+            if len(history) == history.maxlen:
+                self._chars -= _exchange_size(history[0])
+            history.append(exchange)
+            self._chars += _exchange_size(exchange)
+
+        while len(self._conversations) > 1 and (len(self._conversations) > self.max_conversations
+                                                or self._chars > self.max_chars):
+            _, evicted = self._conversations.popitem(last=False)
+            self._chars -= sum(_exchange_size(exchange) for exchange in evicted)
+
+    def _trim_pending(self):
+        """Drop the oldest unwritten rows beyond max_pending; caller holds self._lock"""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            print(f"Warning: Dropped {overflow} unwritten chatbot rows; the database has been unreachable too long")
+
+    def _load_recent(self, user_id):
+        """Reload the most recent exchanges for a logged-in user from the database"""
+        if user_id is None:
+            return []
+        try:
+            db = self._connect()
+            try:
+                rows = db.execute('''
+                    SELECT user_message, bot_response, created_at FROM chatbot_conversations
+                    WHERE user_id = ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                ''', (user_id, self.history_limit)).fetchall()
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"Warning: Could not load chatbot history: {e}")
+            return []
+
+        return [{'user': row[0], 'bot': row[1], 'timestamp': str(row[2])[11:16]} for row in reversed(rows)]
+
+    def append(self, chat_id, user_message, bot_response, user_id=None, context=None):
+        """Record an exchange; rows for logged-in users are queued for the next batch write"""
+        now = datetime.now()
+        with self._lock:
+            self._push(chat_id, [{
+                'user': user_message,
+                'bot': bot_response,
+                'timestamp': now.strftime('%H:%M')
+            }])
+            if user_id is not None:
+                context = dict(context or {}, chat_id=chat_id, timestamp=now.isoformat())
+                self._pending.append((user_id, user_message, bot_response, json.dumps(context)))
+                self._trim_pending()
+            should_flush = len(self._pending) >= self.batch_size
+
+        if should_flush:
+            self.flush()
+
+    def history(self, chat_id, user_id=None):
+        """Return a copy of the recent exchanges for a conversation
+
+        A conversation this worker has not seen (another worker served it, or
+        this one restarted) is reloaded from a logged-in user's stored rows.
+        The database is read without holding self._lock.
+        """
+        with self._lock:
+            history = self._conversations.get(chat_id)
+            if history is not None:
+                self._conversations.move_to_end(chat_id)
+                return list(history)
+
+        self.flush()  # So the reload sees exchanges still waiting for a batch write
+        recent = self._load_recent(user_id)
+
+        with self._lock:
+            # Another request for the same conversation may have filled it meanwhile
+            if chat_id not in self._conversations and recent:
+                self._push(chat_id, recent)
+            return list(self._conversations.get(chat_id, ()))
+
+    def drop(self, chat_id):
+        with self._lock:
+            history = self._conversations.pop(chat_id, None)
+            if history is not None:
+                self._chars -= sum(_exchange_size(exchange) for exchange in history)
+
+    def flush(self):
+        """Write all pending rows in a single transaction"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            try:
+                db = self._connect()
+                try:
+                    db.executemany('''
+                        INSERT INTO chatbot_conversations (user_id, user_message, bot_response, conversation_context)
+                        VALUES (?, ?, ?, ?)
+                    ''', rows)
+                    db.commit()
+                finally:
+                    db.close()
+            except Exception as e:
+                print(f"Warning: Could not store chatbot conversations: {e}")
+                with self._lock:
+                    # Put the rows back so the next flush retries them, within the cap
+                    self._pending[:0] = rows
+                    self._trim_pending()
+                return 0
+            return len(rows)
+
+    def start(self):
+        """Start the background flusher thread (idempotent)"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._run, name='chat-store-flusher', daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,91 @@
+# JSON encoding for the hot endpoints
+# Uses orjson when it is installed and falls back to the stdlib encoder.
+# Values that never change (knowledge-base answers, causal analysis lines) can
+# be wrapped in Fragment once and are then copied into response bodies as
+# already-encoded bytes instead of being re-serialized on every request.
+
+import json
+from datetime import date, datetime
+
+from flask import Response
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+
+def _default(obj):
+    # Match Flask's jsonify so switching encoders does not change dates on the wire
+    if isinstance(obj, (datetime, date)):
+        return http_date(obj)
+    if isinstance(obj, Fragment):
+        return json.loads(obj.raw)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+
+
+def _stdlib_dumps(obj):
+    return _encoder.encode(obj).encode('utf-8')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj):
+        try:
+            return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # orjson refuses integers beyond 64 bits; the stdlib encoder does not
+            return _stdlib_dumps(obj)
+else:
+    _dumps = _stdlib_dumps
+
+
+class Fragment:
+    """A value that has already been encoded to JSON bytes"""
+
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @classmethod
+    def of(cls, value):
+        return cls(_dumps(value))
+
+
+def _contains_fragment(obj):
+    if isinstance(obj, Fragment):
+        return True
+    if isinstance(obj, dict):
+        return any(isinstance(v, (Fragment, dict, list)) and _contains_fragment(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(isinstance(v, (Fragment, dict, list)) and _contains_fragment(v) for v in obj)
+    return False
+
+
+def _splice(obj):
+    """Encode containers by hand only where a Fragment has to be copied in"""
+    if isinstance(obj, Fragment):
+        return obj.raw
+    if not _contains_fragment(obj):
+        return _dumps(obj)
+    if isinstance(obj, dict):
+        return b'{' + b','.join(_dumps(str(k)) + b':' + _splice(v) for k, v in obj.items()) + b'}'
+    return b'[' + b','.join(_splice(v) for v in obj) + b']'
+
+
+def dumps(obj):
+    """Encode obj to JSON bytes, copying any Fragment values in verbatim"""
+    return _splice(obj)
+
+
+def json_response(body, status=200):
+    """Response for an object or for JSON bytes that were already encoded"""
+    if not isinstance(body, bytes):
+        body = dumps(body)
+    return Response(body, status=status, mimetype='application/json')
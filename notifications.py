@@ -0,0 +1,214 @@
+# Per-user notification inboxes
+# Events are written to the notifications table when they happen (risk
+# assessments, appointment decisions, anomalies) or by a background job that
+# emits time-based reminders in batches. Reading an inbox is one range scan
+# over (user_id, id), and unread counts live in notification_counts, updated
+# in the same transaction as the rows they count, so polling never aggregates.
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+NOTIFICATION_PAGE_SIZE = 20
+REMINDER_INTERVAL = int(os.environ.get('REMINDER_INTERVAL', 15 * 60))  # Seconds between reminder runs
+REMINDER_BATCH_SIZE = int(os.environ.get('REMINDER_BATCH_SIZE', 500))  # Users/appointments per transaction
+CHECKUP_OVERDUE_DAYS = int(os.environ.get('CHECKUP_OVERDUE_DAYS', 30))
+APPOINTMENT_REMINDER_HOURS = 24
+
+# Notification type -> Font Awesome icon shown on the dashboard
+NOTIFICATION_ICONS = {
+    'risk': 'fa-exclamation-triangle text-danger',
+    'appointment': 'fa-calendar-check text-success',
+    'anomaly': 'fa-chart-line text-warning',
+    'checkup': 'fa-stethoscope text-info',
+    'reminder': 'fa-bell text-primary',
+}
+
+_ID_COLUMN = {
+    'sqlite': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'postgresql': 'SERIAL PRIMARY KEY',
+}
+
+NOTIFICATION_TABLES_SQL = [
+    '''CREATE TABLE IF NOT EXISTS notifications (
+        id {id_column},
+        user_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        message TEXT NOT NULL,
+        priority TEXT NOT NULL DEFAULT 'medium',
+        dedupe_key TEXT,
+        read_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS notification_counts (
+        user_id INTEGER PRIMARY KEY,
+        unread INTEGER NOT NULL DEFAULT 0
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_notifications_inbox ON notifications (user_id, id)',
+    # Reminders carry a key so reruns and concurrent workers never repeat them
+    '''CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_dedupe ON notifications (user_id, dedupe_key)
+        WHERE dedupe_key IS NOT NULL''',
+    'CREATE INDEX IF NOT EXISTS idx_appointments_start ON appointments (start_time)',
+    'CREATE INDEX IF NOT EXISTS idx_assessments_user_time ON assessments (user_id, created_at)',
+]
+
+_INSERT_NOTIFICATION = '''
+    INSERT INTO notifications (user_id, type, message, priority, dedupe_key)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, dedupe_key) WHERE dedupe_key IS NOT NULL DO NOTHING
+'''
+
+_ADD_UNREAD = '''
+    INSERT INTO notification_counts (user_id, unread) VALUES (?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET unread = notification_counts.unread + excluded.unread
+'''
+
+
+def ensure_notification_tables(db):
+    for sql in NOTIFICATION_TABLES_SQL:
+        db.execute(sql.format(id_column=_ID_COLUMN[db.dialect]))
+    db.commit()
+
+
+def notify_many(db, events):
+    """Write (user_id, type, message, priority, dedupe_key) events and bump unread counts; caller commits"""
+    added = {}
+    for user_id, kind, message, priority, dedupe_key in events:
+        if db.execute(_INSERT_NOTIFICATION, (user_id, kind, message, priority, dedupe_key)).rowcount:
+            added[user_id] = added.get(user_id, 0) + 1
+    if added:
+        db.executemany(_ADD_UNREAD, sorted(added.items()))
+    return sum(added.values())
+
+
+def notify(db, user_id, kind, message, priority='medium', dedupe_key=None):
+    """Write one event to a user's inbox; caller commits"""
+    return notify_many(db, [(user_id, kind, message, priority, dedupe_key)])
+
+
+def inbox(db, user_id, before=None, limit=NOTIFICATION_PAGE_SIZE):
+    """Newest notifications first, starting below the `before` cursor; returns (items, next cursor)"""
+    rows = db.execute('''
+        SELECT id, type, message, priority, read_at, created_at
+        FROM notifications
+        WHERE user_id = ? AND id < ?
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (user_id, before if before is not None else 2 ** 62, limit + 1)).fetchall()
+
+    items = []
+    for row in rows[:limit]:
+        item = dict(row)
+        item['icon'] = NOTIFICATION_ICONS.get(row['type'], NOTIFICATION_ICONS['reminder'])
+        item['read'] = row['read_at'] is not None
+        items.append(item)
+    next_cursor = items[-1]['id'] if len(rows) > limit else None
+    return items, next_cursor
+
+
+def unread_count(db, user_id):
+    row = db.execute('SELECT unread FROM notification_counts WHERE user_id = ?', (user_id,)).fetchone()
+    return row['unread'] if row else 0
+
+
+def mark_read(db, user_id, up_to_id):
+    """Mark every notification up to and including up_to_id as read; returns how many changed"""
+    changed = db.execute('''
+        UPDATE notifications SET read_at = ?
+        WHERE user_id = ? AND id <= ? AND read_at IS NULL
+    ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), user_id, up_to_id)).rowcount
+    if changed:
+        db.execute('UPDATE notification_counts SET unread = unread - ? WHERE user_id = ?', (changed, user_id))
+    db.commit()
+    return changed
+
+
+def _overdue_checkups(db, now, batch_size):
+    """Patients whose last assessment (or sign-up, if they have none) is older than CHECKUP_OVERDUE_DAYS"""
+    cutoff = (now - timedelta(days=CHECKUP_OVERDUE_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    week = now.strftime('%G-W%V')
+    last_id = 0
+    while True:
+        rows = db.execute('''
+            SELECT u.id, MAX(a.created_at) as last_assessment
+            FROM users u
+            LEFT JOIN assessments a ON a.user_id = u.id
+            WHERE u.user_type = 'patient' AND u.id > ?
+            GROUP BY u.id
+            HAVING COALESCE(MAX(a.created_at), u.created_at) < ?
+            ORDER BY u.id
+            LIMIT ?
+        ''', (last_id, cutoff, batch_size)).fetchall()
+        if not rows:
+            return
+        # One reminder per patient per ISO week
+        yield [(row['id'], 'checkup',
+                'Your monthly check-up is overdue. Take a new assessment to keep your results current.',
+                'medium', f'checkup:{week}') for row in rows]
+        last_id = rows[-1]['id']
+
+
+def _upcoming_appointments(db, now, batch_size):
+    """Booked appointments starting within APPOINTMENT_REMINDER_HOURS, in batches"""
+    start = now.strftime('%Y-%m-%d %H:%M:%S')
+    end = (now + timedelta(hours=APPOINTMENT_REMINDER_HOURS)).strftime('%Y-%m-%d %H:%M:%S')
+    last_id = 0
+    while True:
+        rows = db.execute('''
+            SELECT id, user_id, appointment_type, start_time
+            FROM appointments
+            WHERE start_time >= ? AND start_time < ? AND status IN ('pending', 'approved', 'confirmed') AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (start, end, last_id, batch_size)).fetchall()
+        if not rows:
+            return
+        yield [(row['user_id'], 'reminder',
+                f"Reminder: your {row['appointment_type']} appointment is at {str(row['start_time'])[:16]}",
+                'high', f"appointment:{row['id']}") for row in rows]
+        last_id = rows[-1]['id']
+
+
+class ReminderJob:
+    """Emits time-based reminders into user inboxes, once or periodically in a background thread"""
+
+    def __init__(self, connect, interval=REMINDER_INTERVAL, batch_size=REMINDER_BATCH_SIZE):
+        self._connect = connect
+        self.interval = interval
+        self.batch_size = batch_size
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, now=None):
+        """Write due reminders; returns how many notifications were added"""
+        now = now or datetime.now()
+        added = 0
+        db = self._connect()
+        try:
+            for source in (_overdue_checkups, _upcoming_appointments):
+                for batch in source(db, now, self.batch_size):
+                    added += notify_many(db, batch)
+                    db.commit()  # One short transaction per batch
+                    if self._stop.is_set():
+                        return added
+        finally:
+            db.close()
+        return added
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='reminder-job', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: Reminder run failed: {e}")
@@ -0,0 +1,103 @@
+# Password hashing off the request worker
+# PBKDF2 with 600k iterations is CPU-bound; running it in a small process pool
+# with a cap on queued jobs keeps a burst of logins from starving other routes.
+# The cap only means something when a gunicorn worker serves several requests
+# at once, so the app runs under the gthread worker class (see render.yaml)
+# and PASSWORD_HASH_QUEUE should stay below its --threads count.
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', PASSWORD_HASH_WORKERS * 2))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+# Forking a worker that already runs background threads can copy their held locks into
+# the child, so pool processes come from a clean forkserver (spawn where it is missing)
+POOL_START_METHOD = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool already has its maximum number of jobs queued"""
+
+
+class PasswordHasher:
+    """Bounded process pool for hashing and verifying passwords"""
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_QUEUE,
+                 timeout=PASSWORD_HASH_TIMEOUT, method=PASSWORD_HASH_METHOD):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.method = method
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Create the pool lazily in each process so forked gunicorn workers get their own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=get_context(POOL_START_METHOD))
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard(self, executor):
+        """Drop a pool that lost a process; it stays broken, so the next call starts a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        executor = self._pool()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            executor = self._pool()
+            return executor, executor.submit(fn, *args)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy('Password hashing queue is full')
+        try:
+            executor, future = self._submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job itself finishes, not just until this caller
+        # gives up waiting, so max_queue also bounds the pool's backlog
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordPoolBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise PasswordPoolBusy('Password hashing process exited')
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when a stored hash was made with different parameters than the current method"""
+        return pwhash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,162 @@
+# Rate limiting and admission control for the public endpoints
+# Token buckets are kept per client and route in a small local SQLite file so
+# every gunicorn worker on the host sees the same state; each check is a
+# single UPSERT on the bucket's primary key. Concurrency caps live in the same
+# file: each admitted request holds a row in `in_flight` until it finishes, so
+# one busy route cannot take every request slot on the host.
+
+import itertools
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import g, jsonify, request, session
+
+RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'alzheimer_rate_limit.db'))
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+
+# endpoint -> (tokens per second, bucket size, concurrent requests across the host's workers)
+ROUTE_LIMITS = {
+    'calculate_risk': (0.5, 10, 8),
+    'chatbot': (1.0, 20, 4),
+    'predictive_alerts': (0.5, 10, 4),
+    'mood_tracking': (0.2, 10, 4),
+}
+
+# Emergencies skip every check
+EXEMPT_ENDPOINTS = {'emergency_contact'}
+
+PRUNE_EVERY = 1000         # Checks between removals of idle buckets
+IDLE_BUCKET_SECONDS = 3600
+IN_FLIGHT_EXPIRY = 120     # Seconds after which a slot from a killed worker stops counting
+
+
+class RateLimiter:
+    """Per-client, per-route token buckets shared through a local SQLite file"""
+
+    def __init__(self, app=None, path=RATE_LIMIT_DB, limits=ROUTE_LIMITS, exempt=EXEMPT_ENDPOINTS,
+                 enabled=RATE_LIMIT_ENABLED):
+        self.path = path
+        self.limits = limits
+        self.exempt = exempt
+        self.enabled = enabled
+        self._local = threading.local()
+        self._checks = 0
+        self._slot_ids = itertools.count()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = OFF')
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    allowed INTEGER NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS in_flight (
+                    id TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    started REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_in_flight_endpoint ON in_flight (endpoint, started)')
+            self._local.db = db
+        return db
+
+    def hit(self, key, rate, burst, now=None):
+        """Take one token from a bucket; returns (allowed, seconds until a token is available)"""
+        now = time.time() if now is None else now
+        refilled = 'min(:burst, tokens + (:now - updated) * :rate)'
+        db = self._db()
+        tokens, allowed = db.execute(f'''
+            INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+            ON CONFLICT (key) DO UPDATE SET
+                allowed = {refilled} >= 1,
+                tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END,
+                updated = :now
+            RETURNING tokens, allowed
+        ''', {'key': key, 'rate': rate, 'burst': burst, 'now': now}).fetchone()
+
+        self._checks += 1
+        if self._checks % PRUNE_EVERY == 0:
+            db.execute('DELETE FROM buckets WHERE updated < ?', (now - IDLE_BUCKET_SECONDS,))
+            db.execute('DELETE FROM in_flight WHERE started < ?', (now - IN_FLIGHT_EXPIRY,))
+
+        if allowed:
+            return True, 0
+        return False, max(1, math.ceil((1 - tokens) / rate))
+
+    def acquire_slot(self, endpoint, limit, now=None):
+        """Claim one of `limit` concurrent slots for an endpoint; returns the slot id, or None when all are taken"""
+        now = time.time() if now is None else now
+        slot_id = f'{os.getpid()}:{next(self._slot_ids)}'
+        # Count and insert in one statement so two workers cannot both take the last slot
+        claimed = self._db().execute('''
+            INSERT INTO in_flight (id, endpoint, started)
+            SELECT :id, :endpoint, :now
+            WHERE (SELECT COUNT(*) FROM in_flight WHERE endpoint = :endpoint AND started >= :expired) < :limit
+        ''', {'id': slot_id, 'endpoint': endpoint, 'now': now, 'expired': now - IN_FLIGHT_EXPIRY,
+              'limit': limit}).rowcount
+        return slot_id if claimed else None
+
+    def release_slot(self, slot_id):
+        self._db().execute('DELETE FROM in_flight WHERE id = ?', (slot_id,))
+
+    @staticmethod
+    def client_key():
+        """Logged-in users are limited by account, everyone else by address"""
+        if 'user_id' in session:
+            return f"user:{session['user_id']}"
+        return f'ip:{request.remote_addr}'
+
+    @staticmethod
+    def _too_many(message, retry_after, status=429):
+        response = jsonify({'error': message, 'retry_after': retry_after})
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def _before_request(self):
+        endpoint = request.endpoint
+        if not self.enabled or endpoint in self.exempt or endpoint not in self.limits:
+            return None
+
+        rate, burst, concurrency = self.limits[endpoint]
+        try:
+            allowed, retry_after = self.hit(f'{endpoint}:{self.client_key()}', rate, burst)
+            if not allowed:
+                return self._too_many('Too many requests, please slow down', retry_after)
+            slot_id = self.acquire_slot(endpoint, concurrency)
+        except sqlite3.Error as e:
+            # Never turn a limiter problem into an outage
+            print(f"Warning: Rate limiter unavailable: {e}")
+            return None
+        if slot_id is None:
+            return self._too_many('Server is busy, please try again in a moment', 1, status=503)
+        g.rate_limit_slot = slot_id
+        return None
+
+    def _teardown_request(self, exception):
+        slot_id = g.pop('rate_limit_slot', None)
+        if slot_id is None:
+            return
+        try:
+            self.release_slot(slot_id)
+        except sqlite3.Error as e:
+            # The row expires after IN_FLIGHT_EXPIRY seconds
+            print(f"Warning: Could not release rate limit slot: {e}")
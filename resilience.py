@@ -0,0 +1,189 @@
+# Graceful degradation for read endpoints
+# Guarded reads run under a short per-query timeout. Lock and timeout errors
+# are counted by a circuit breaker; once it trips, requests stop waiting on the
+# database and are answered from the last good response for the same key
+# (stale-while-revalidate), while a background thread probes the database and
+# refreshes those entries. When nothing is cached the caller gets a quick 503
+# instead of a worker stuck behind a lock.
+# SQLite runs in WAL mode, where a writer (even one holding an EXCLUSIVE lock)
+# never blocks readers, so there the breaker is tripped by queries that
+# overrun the timeout and by an exhausted connection pool, not by write locks.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from storage import DB_UNAVAILABLE_ERRORS
+
+DB_READ_TIMEOUT = float(os.environ.get('DB_READ_TIMEOUT', 2.0))            # Seconds per guarded read
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 3))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', 15.0))  # Seconds open before probing
+STALE_CACHE_SIZE = int(os.environ.get('STALE_CACHE_SIZE', 10000))           # Cached responses per worker
+STALE_MAX_AGE = int(os.environ.get('STALE_MAX_AGE', 3600))                  # Oldest response served, seconds
+REFRESH_INTERVAL = 1.0  # Seconds between background refresh attempts
+
+
+class ReadUnavailable(Exception):
+    """The database cannot serve the read and there is no usable cached response"""
+
+    def __init__(self, retry_after):
+        super().__init__('Data temporarily unavailable')
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open single probe -> closed on success"""
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True when a call may go to the database; in half-open state only one probe at a time"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            # A probe that never reported back does not keep the breaker half-open forever
+            if time.monotonic() - self._changed_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._changed_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._changed_at = time.monotonic()
+
+    def retry_after(self):
+        with self._lock:
+            if self.state == 'closed':
+                return 1
+            return max(1, int(self.reset_timeout - (time.monotonic() - self._changed_at)) + 1)
+
+
+class GuardedReads:
+    """Timeout + circuit breaker + stale response cache around read-only queries"""
+
+    def __init__(self, connect, timeout=DB_READ_TIMEOUT, breaker=None, cache_size=STALE_CACHE_SIZE,
+                 max_age=STALE_MAX_AGE, refresh_interval=REFRESH_INTERVAL):
+        self._connect = connect
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.cache_size = cache_size
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+
+        self._cache = OrderedDict()    # key -> (value, stored_at)
+        self._pending = OrderedDict()  # key -> loader waiting for a background refresh
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._cache[key] = (value, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._pending.pop(key, None)
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        return (value, age) if age <= self.max_age else None
+
+    def _run(self, db, loader):
+        with db.timeout(self.timeout):
+            return loader(db)
+
+    def fetch(self, key, loader, db_factory):
+        """Return (value, age): age is None for a live read, else the seconds since the cached value was read
+
+        loader(db) runs the queries. db_factory() supplies the request's connection and
+        is only called when the breaker lets the read through.
+        """
+        if self.breaker.allow():
+            try:
+                value = self._run(db_factory(), loader)
+            except DB_UNAVAILABLE_ERRORS as e:
+                self.breaker.record_failure()
+                print(f"Warning: Guarded read {key[0]} failed: {e}")
+            else:
+                self.breaker.record_success()
+                self._store(key, value)
+                return value, None
+
+        cached = self._cached(key)
+        with self._lock:
+            self._pending[key] = loader
+            self._pending.move_to_end(key)
+            while len(self._pending) > self.cache_size:
+                self._pending.popitem(last=False)
+        if cached is None:
+            raise ReadUnavailable(self.breaker.retry_after())
+        return cached
+
+    def refresh_pending(self):
+        """Re-run reads that were served stale; returns how many entries were refreshed"""
+        refreshed = 0
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._pending:
+                    break
+                key, loader = next(iter(self._pending.items()))
+            if not self.breaker.allow():
+                break
+            db = None
+            try:
+                db = self._connect()
+                value = self._run(db, loader)
+            except DB_UNAVAILABLE_ERRORS:
+                self.breaker.record_failure()
+                break
+            except Exception as e:
+                # Not a database outage; retrying would fail the same way
+                with self._lock:
+                    self._pending.pop(key, None)
+                print(f"Warning: Background refresh of {key[0]} failed: {e}")
+                continue
+            finally:
+                if db is not None:
+                    db.close()
+            self.breaker.record_success()
+            self._store(key, value)
+            refreshed += 1
+        return refreshed
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name='guarded-read-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh_pending()
+            except Exception as e:
+                print(f"Warning: Background refresh failed: {e}")
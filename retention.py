@@ -0,0 +1,231 @@
+# Data retention for high-volume log tables
+# Rows older than the retention horizon are rolled into per-user daily
+# aggregates, appended to gzip NDJSON archives (one file per table per month)
+# and deleted from the hot table. Work is done in small chunks, each in its
+# own short transaction, so the job never holds the write lock for long.
+
+import gzip
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from run_lock import acquire_run_lock
+
+RETENTION_DAYS = int(os.environ.get('RETENTION_DAYS', 180))
+RETENTION_CHUNK_SIZE = int(os.environ.get('RETENTION_CHUNK_SIZE', 500))
+RETENTION_CHUNK_PAUSE = float(os.environ.get('RETENTION_CHUNK_PAUSE', 0.05))  # Seconds between chunks
+RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL', 24 * 3600))     # Seconds between runs
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')
+ARCHIVE_PAGE_SIZE = 100      # Archived rows per /doctor/archive page
+MAX_ARCHIVE_PAGE_SIZE = 1000
+MIN_RETENTION_DAYS = 31  # Dashboards read the last 30 days of raw rows
+
+RETENTION_TABLES_SQL = [
+    '''CREATE TABLE IF NOT EXISTS mood_daily (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        mood TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day, mood)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS emergency_daily (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        emergency_type TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day, emergency_type)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS chatbot_daily (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        messages INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day)
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_mood_logs_user_time ON mood_logs (user_id, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_emergency_logs_user_time ON emergency_logs (user_id, timestamp)',
+]
+
+
+def _mood_key(row):
+    return (row['user_id'], str(row['timestamp'])[:10], row['mood'])
+
+
+def _emergency_key(row):
+    return (row['user_id'], str(row['timestamp'])[:10], row['emergency_type'])
+
+
+def _chat_key(row):
+    return (row['user_id'], str(row['created_at'])[:10])
+
+
+# table -> (timestamp column, aggregate key function, aggregate upsert)
+RETENTION_POLICIES = {
+    'mood_logs': ('timestamp', _mood_key, '''
+        INSERT INTO mood_daily (user_id, day, mood, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, day, mood) DO UPDATE SET count = mood_daily.count + excluded.count
+    '''),
+    'emergency_logs': ('timestamp', _emergency_key, '''
+        INSERT INTO emergency_daily (user_id, day, emergency_type, count) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, day, emergency_type) DO UPDATE SET count = emergency_daily.count + excluded.count
+    '''),
+    'chatbot_conversations': ('created_at', _chat_key, '''
+        INSERT INTO chatbot_daily (user_id, day, messages) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, day) DO UPDATE SET messages = chatbot_daily.messages + excluded.messages
+    '''),
+}
+
+
+def ensure_retention_tables(db):
+    for sql in RETENTION_TABLES_SQL:
+        db.execute(sql)
+    db.commit()
+
+
+def archive_path(table, month, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, table, f'{month}.ndjson.gz')
+
+
+def _append_archive(table, rows, ts_column, archive_dir):
+    """Append rows to their monthly archive files and flush them to disk"""
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(str(row[ts_column])[:7], []).append(row)
+
+    for month, month_rows in by_month.items():
+        path = archive_path(table, month, archive_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Each append is a separate gzip member; gzip readers treat them as one stream
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for row in month_rows:
+                    f.write(json.dumps(row, default=str).encode('utf-8') + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def query_archive(table, month, user_id=None, after_id=None, limit=ARCHIVE_PAGE_SIZE, archive_dir=ARCHIVE_DIR):
+    """Archived rows for a month after the `after_id` cursor, optionally for one user; returns (rows, next cursor)"""
+    if table not in RETENTION_POLICIES:
+        raise ValueError(f'Unknown archived table: {table}')
+    path = archive_path(table, month, archive_dir)
+    if not os.path.exists(path):
+        return [], None
+
+    # Compaction archives in id order, so ids ascend through the file; a chunk
+    # retried after a failed delete repeats ids already passed and is skipped
+    last_id = after_id if after_id is not None else -1
+    rows = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            if row['id'] <= last_id or (user_id is not None and row['user_id'] != user_id):
+                continue
+            rows.append(row)
+            last_id = row['id']
+            if len(rows) > limit:
+                break
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def compact_chunk(db, table, horizon, chunk_size=RETENTION_CHUNK_SIZE, archive_dir=ARCHIVE_DIR):
+    """Archive, aggregate and delete one chunk of rows older than horizon; returns rows moved"""
+    ts_column, key_fn, upsert_sql = RETENTION_POLICIES[table]
+    rows = db.execute(f'''
+        SELECT * FROM {table}
+        WHERE {ts_column} < ?
+        ORDER BY id
+        LIMIT ?
+    ''', (horizon, chunk_size)).fetchall()
+    db.commit()
+    if not rows:
+        return 0
+
+    rows = [dict(row) for row in rows]
+    _append_archive(table, rows, ts_column, archive_dir)
+
+    counts = Counter(key_fn(row) for row in rows)
+    ids = [row['id'] for row in rows]
+    try:
+        db.executemany(upsert_sql, [key + (count,) for key, count in counts.items()])
+        db.execute(f'DELETE FROM {table} WHERE id IN ({", ".join("?" * len(ids))})', ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def _maintain(db, table):
+    """Return freed pages to the filesystem where possible and refresh planner statistics"""
+    if db.dialect == 'sqlite':
+        if db.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+            db.execute('PRAGMA incremental_vacuum(1000)').fetchall()
+        db.execute(f'ANALYZE {table}')
+    else:
+        # VACUUM cannot run inside a transaction; autovacuum reclaims space on PostgreSQL
+        db.execute(f'ANALYZE {table}')
+    db.commit()
+
+
+class RetentionJob:
+    """Runs compaction over the log tables, once or periodically in a background thread"""
+
+    def __init__(self, connect, retention_days=RETENTION_DAYS, chunk_size=RETENTION_CHUNK_SIZE,
+                 chunk_pause=RETENTION_CHUNK_PAUSE, interval=RETENTION_INTERVAL, archive_dir=ARCHIVE_DIR):
+        self._connect = connect
+        self.retention_days = max(retention_days, MIN_RETENTION_DAYS)
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, now=None, wait=False):
+        """Compact every table; returns rows moved per table, or None if another process is running
+
+        Only one process compacts at a time; wait=True queues behind a run in progress.
+        """
+        lock_file = acquire_run_lock(self.archive_dir, '.retention.lock', wait)
+        if lock_file is None:
+            return None
+
+        horizon = (now or datetime.now()) - timedelta(days=self.retention_days)
+        moved = {}
+        db = self._connect()
+        try:
+            for table in RETENTION_POLICIES:
+                moved[table] = 0
+                while not self._stop.is_set():
+                    count = compact_chunk(db, table, horizon, self.chunk_size, self.archive_dir)
+                    moved[table] += count
+                    if count < self.chunk_size:
+                        break
+                    time.sleep(self.chunk_pause)  # Let waiting writers in between chunks
+                if moved[table]:
+                    _maintain(db, table)
+        finally:
+            db.close()
+            lock_file.close()
+        return moved
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='retention-job', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: Data retention run failed: {e}")
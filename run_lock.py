@@ -0,0 +1,30 @@
+# Cross-process run locks for background jobs
+# Every gunicorn worker starts the same periodic jobs, so jobs that must not
+# overlap (compaction, the analytics snapshot) take an exclusive flock on a
+# file next to the data they write. The lock goes away when the file is
+# closed, including when the process holding it dies.
+
+import os
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; jobs then rely on a single runner
+    fcntl = None
+
+
+def acquire_run_lock(directory, name, wait=False):
+    """Open lock file holding directory/name exclusively; None if another process has it
+
+    With wait=True the call blocks until the lock is free instead of giving up.
+    Close the returned file to release the lock.
+    """
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, name), 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
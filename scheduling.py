@@ -0,0 +1,304 @@
+# Appointment scheduling
+# Doctors publish weekly availability windows split into fixed-length slots.
+# Booked slots are kept per doctor in sorted arrays so a conflict check or a
+# "next free slot" lookup is a binary search instead of a table scan. The
+# partial unique index on appointments (doctor_id, start_time) is the final
+# arbiter: two workers racing for the same slot cannot both commit, and the
+# loser reloads its view of that doctor's calendar.
+
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from storage import DB_INTEGRITY_ERRORS
+
+SCHEDULING_HORIZON_DAYS = int(os.environ.get('SCHEDULING_HORIZON_DAYS', 60))     # How far ahead slots are offered
+CALENDAR_REFRESH_INTERVAL = int(os.environ.get('CALENDAR_REFRESH_INTERVAL', 60))  # Seconds before reloading a calendar
+MAX_CALENDARS = int(os.environ.get('MAX_CALENDARS', 5000))  # Doctor calendars kept in memory
+DEFAULT_SLOT_MINUTES = 30
+
+ACTIVE_STATUSES = ('pending', 'approved', 'confirmed')  # Statuses that hold a slot
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEDULING_SQL = [
+    '''CREATE TABLE IF NOT EXISTS doctor_availability (
+        doctor_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        slot_minutes INTEGER NOT NULL DEFAULT 30,
+        PRIMARY KEY (doctor_id, weekday, start_time),
+        FOREIGN KEY (doctor_id) REFERENCES users (id)
+    )''',
+    '''CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_doctor_slot ON appointments (doctor_id, start_time)
+        WHERE status IN ('pending', 'approved', 'confirmed')''',
+    'CREATE INDEX IF NOT EXISTS idx_appointments_user ON appointments (user_id, preferred_date)',
+    'CREATE INDEX IF NOT EXISTS idx_appointments_doctor_day ON appointments (doctor_id, preferred_date)',
+    'CREATE INDEX IF NOT EXISTS idx_appointments_status ON appointments (status, created_at)',
+]
+
+APPOINTMENT_COLUMNS = {
+    'doctor_id': 'INTEGER REFERENCES users (id)',
+    'start_time': 'TIMESTAMP',
+    'end_time': 'TIMESTAMP',
+}
+
+
+class SlotUnavailable(Exception):
+    """The requested slot is taken or outside the doctor's hours"""
+
+    def __init__(self, message, next_slot=None):
+        super().__init__(message)
+        self.next_slot = next_slot
+
+
+def ensure_scheduling_schema(db):
+    """Add the scheduling columns, availability table and indexes to existing databases"""
+    if db.dialect == 'sqlite':
+        existing = {row['name'] for row in db.execute('PRAGMA table_info(appointments)')}
+        for column, definition in APPOINTMENT_COLUMNS.items():
+            if column not in existing:
+                db.execute(f'ALTER TABLE appointments ADD COLUMN {column} {definition}')
+    else:
+        for column, definition in APPOINTMENT_COLUMNS.items():
+            db.execute(f'ALTER TABLE appointments ADD COLUMN IF NOT EXISTS {column} {definition}')
+    for sql in SCHEDULING_SQL:
+        db.execute(sql)
+    db.commit()
+
+
+def parse_time_of_day(value):
+    """'HH:MM' -> minutes after midnight"""
+    if not isinstance(value, str):
+        raise ValueError(f'Invalid time of day: {value!r}')
+    hours, minutes = value.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 24 * 60:
+        raise ValueError(f'Invalid time of day: {value}')
+    return hours * 60 + minutes
+
+
+def format_time_of_day(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def naive_local(value):
+    """Datetimes with a UTC offset -> the same instant as naive server-local time, like every stored slot"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def to_datetime(value):
+    """Timestamps come back as strings from SQLite and as datetimes from PostgreSQL"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+class DoctorCalendar:
+    """Availability windows and booked intervals for one doctor"""
+
+    def __init__(self, windows, bookings):
+        self.windows = windows  # weekday -> [(start minute, end minute, slot minutes)]
+        self.starts = [start for start, _ in bookings]
+        self.ends = [end for _, end in bookings]
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def conflicts(self, start, end):
+        """True when [start, end) overlaps a booked interval"""
+        # Booked intervals never overlap each other, so only the bookings
+        # either side of the insertion point can intersect the new one
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return True
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start, end):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def remove(self, start):
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.starts[i] == start:
+            del self.starts[i]
+            del self.ends[i]
+
+    def slot_length(self, start):
+        """Length of the availability slot beginning at start, or None if start is not on the grid"""
+        minute = start.hour * 60 + start.minute
+        if start.second or start.microsecond:
+            return None
+        for window_start, window_end, slot_minutes in self.windows.get(start.weekday(), ()):
+            if window_start <= minute and minute + slot_minutes <= window_end \
+                    and (minute - window_start) % slot_minutes == 0:
+                return timedelta(minutes=slot_minutes)
+        return None
+
+    def day_slots(self, day):
+        """Every (start, end) slot on a calendar day, booked or not"""
+        midnight = datetime(day.year, day.month, day.day)
+        for window_start, window_end, slot_minutes in self.windows.get(day.weekday(), ()):
+            for minute in range(window_start, window_end - slot_minutes + 1, slot_minutes):
+                start = midnight + timedelta(minutes=minute)
+                yield start, start + timedelta(minutes=slot_minutes)
+
+
+class Scheduler:
+    """Per-doctor slot indexes with conflict checks and atomic booking"""
+
+    def __init__(self, horizon_days=SCHEDULING_HORIZON_DAYS, refresh_interval=CALENDAR_REFRESH_INTERVAL,
+                 max_calendars=MAX_CALENDARS):
+        self.horizon_days = horizon_days
+        self.refresh_interval = refresh_interval
+        self.max_calendars = max_calendars
+        self._calendars = OrderedDict()  # doctor_id -> DoctorCalendar
+        self._lock = threading.Lock()
+
+    def _load(self, db, doctor_id):
+        windows = {}
+        for row in db.execute('''
+            SELECT weekday, start_time, end_time, slot_minutes
+            FROM doctor_availability
+            WHERE doctor_id = ?
+            ORDER BY weekday, start_time
+        ''', (doctor_id,)):
+            windows.setdefault(row['weekday'], []).append(
+                (parse_time_of_day(row['start_time']), parse_time_of_day(row['end_time']), row['slot_minutes']))
+
+        # Only bookings that can still conflict with a new one; the status
+        # filter matches the partial unique index so it serves this query
+        since = (datetime.now() - timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+        bookings = [(to_datetime(row['start_time']), to_datetime(row['end_time'])) for row in db.execute('''
+            SELECT start_time, end_time
+            FROM appointments
+            WHERE doctor_id = ? AND start_time >= ? AND status IN ('pending', 'approved', 'confirmed')
+            ORDER BY start_time
+        ''', (doctor_id, since))]
+        return DoctorCalendar(windows, bookings)
+
+    def calendar(self, db, doctor_id, refresh=False):
+        """Return the doctor's calendar, loading it on first use or once it is stale"""
+        with self._lock:
+            calendar = self._calendars.get(doctor_id)
+            if calendar is not None:
+                self._calendars.move_to_end(doctor_id)
+        if calendar is not None and not refresh and time.monotonic() - calendar.loaded_at < self.refresh_interval:
+            return calendar
+
+        fresh = self._load(db, doctor_id)
+        with self._lock:
+            if calendar is not None:
+                fresh.lock = calendar.lock  # Keep serializing bookings already waiting on the old calendar
+            self._calendars[doctor_id] = fresh
+            self._calendars.move_to_end(doctor_id)
+            while len(self._calendars) > self.max_calendars:
+                self._calendars.popitem(last=False)
+        return fresh
+
+    def invalidate(self, doctor_id):
+        with self._lock:
+            self._calendars.pop(doctor_id, None)
+
+    def availability(self, db, doctor_id):
+        calendar = self.calendar(db, doctor_id)
+        return [
+            {'weekday': weekday, 'start': format_time_of_day(start), 'end': format_time_of_day(end),
+             'slot_minutes': slot_minutes}
+            for weekday in sorted(calendar.windows)
+            for start, end, slot_minutes in calendar.windows[weekday]
+        ]
+
+    def set_availability(self, db, doctor_id, windows):
+        """Replace the doctor's weekly windows; each window is {weekday, start, end, slot_minutes}"""
+        rows = []
+        for window in windows:
+            weekday = int(window['weekday'])
+            start = parse_time_of_day(window['start'])
+            end = parse_time_of_day(window['end'])
+            slot_minutes = int(window.get('slot_minutes', DEFAULT_SLOT_MINUTES))
+            if not 0 <= weekday <= 6 or slot_minutes <= 0 or start + slot_minutes > end:
+                raise ValueError(f'Invalid availability window: {window}')
+            rows.append((doctor_id, weekday, format_time_of_day(start), format_time_of_day(end), slot_minutes))
+
+        rows.sort(key=lambda row: (row[1], row[2]))
+        for previous, current in zip(rows, rows[1:]):
+            if previous[1] == current[1] and previous[3] > current[2]:
+                raise ValueError(f'Availability windows overlap on weekday {current[1]}')
+
+        db.execute('DELETE FROM doctor_availability WHERE doctor_id = ?', (doctor_id,))
+        db.executemany('''
+            INSERT INTO doctor_availability (doctor_id, weekday, start_time, end_time, slot_minutes)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        db.commit()
+        self.invalidate(doctor_id)
+
+    def free_slots(self, db, doctor_id, day):
+        """Unbooked future slots on one day"""
+        calendar = self.calendar(db, doctor_id)
+        now = datetime.now()
+        return [start for start, end in calendar.day_slots(day)
+                if start > now and not calendar.conflicts(start, end)]
+
+    def next_free_slot(self, db, doctor_id, after=None, calendar=None):
+        """First unbooked slot after `after` (default now) within the scheduling horizon"""
+        calendar = calendar or self.calendar(db, doctor_id)
+        if not calendar.windows:
+            return None
+        now = datetime.now()
+        after = max(naive_local(after) or now, now)
+        day = after.date()
+        for _ in range(self.horizon_days + 1):
+            for start, end in calendar.day_slots(day):
+                if start > after and not calendar.conflicts(start, end):
+                    return start
+            day += timedelta(days=1)
+        return None
+
+    def book(self, db, user_id, doctor_id, start, appointment_type, notes=''):
+        """Reserve a slot and insert the appointment; raises SlotUnavailable on any conflict"""
+        start = naive_local(start)
+        calendar = self.calendar(db, doctor_id)
+        if start <= datetime.now() or start > datetime.now() + timedelta(days=self.horizon_days):
+            raise SlotUnavailable('Appointments can only be booked for upcoming slots',
+                                  self.next_free_slot(db, doctor_id, calendar=calendar))
+        length = calendar.slot_length(start)
+        if length is None:
+            raise SlotUnavailable('The doctor is not available at that time',
+                                  self.next_free_slot(db, doctor_id, start, calendar=calendar))
+        end = start + length
+
+        with calendar.lock:
+            if calendar.conflicts(start, end):
+                raise SlotUnavailable('That slot is already booked',
+                                      self.next_free_slot(db, doctor_id, start, calendar=calendar))
+            try:
+                appointment_id = db.insert('''
+                    INSERT INTO appointments
+                        (user_id, doctor_id, appointment_type, preferred_date, start_time, end_time, notes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, doctor_id, appointment_type, start.date().isoformat(),
+                      start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT), notes))
+                db.commit()
+            except DB_INTEGRITY_ERRORS:
+                # Another worker booked it first; our copy of the calendar is stale
+                db.rollback()
+                calendar = self.calendar(db, doctor_id, refresh=True)
+                raise SlotUnavailable('That slot is already booked',
+                                      self.next_free_slot(db, doctor_id, start, calendar=calendar))
+            calendar.add(start, end)
+        return appointment_id, start, end
+
+    def release(self, doctor_id, start):
+        """Forget a booking after it was rejected or cancelled"""
+        with self._lock:
+            calendar = self._calendars.get(doctor_id)
+        if calendar is not None and start is not None:
+            with calendar.lock:
+                calendar.remove(to_datetime(start))
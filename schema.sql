@@ -1,3 +1,6 @@
+-- Lets the retention job hand freed pages back with PRAGMA incremental_vacuum
+PRAGMA auto_vacuum = INCREMENTAL;
+
 DROP TABLE IF EXISTS users;
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,12 +61,33 @@ DROP TABLE IF EXISTS appointments;
 CREATE TABLE appointments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL,
+    doctor_id INTEGER, -- NULL for requests not yet assigned to a doctor
     appointment_type TEXT NOT NULL,
     preferred_date DATE NOT NULL,
+    start_time TIMESTAMP, -- Booked slot, when a doctor was chosen
+    end_time TIMESTAMP,
     notes TEXT,
-    status TEXT DEFAULT 'pending', -- pending, confirmed, completed, cancelled
+    status TEXT DEFAULT 'pending', -- pending, approved, rejected, confirmed, completed, cancelled
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (user_id) REFERENCES users (id)
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (doctor_id) REFERENCES users (id)
+);
+
+-- At most one active appointment per doctor and slot
+CREATE UNIQUE INDEX idx_appointments_doctor_slot ON appointments (doctor_id, start_time)
+    WHERE status IN ('pending', 'approved', 'confirmed');
+CREATE INDEX idx_appointments_user ON appointments (user_id, preferred_date);
+CREATE INDEX idx_appointments_status ON appointments (status, created_at);
+
+DROP TABLE IF EXISTS doctor_availability;
+CREATE TABLE doctor_availability (
+    doctor_id INTEGER NOT NULL,
+    weekday INTEGER NOT NULL, -- 0 = Monday
+    start_time TEXT NOT NULL, -- HH:MM
+    end_time TEXT NOT NULL,
+    slot_minutes INTEGER NOT NULL DEFAULT 30,
+    PRIMARY KEY (doctor_id, weekday, start_time),
+    FOREIGN KEY (doctor_id) REFERENCES users (id)
 );
 
 DROP TABLE IF EXISTS health_metrics;
@@ -95,3 +119,5 @@ CREATE TABLE chatbot_conversations (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id)
 );
+
+CREATE INDEX idx_chatbot_conversations_user ON chatbot_conversations (user_id, id);
@@ -0,0 +1,122 @@
+-- PostgreSQL version of schema.sql, used when DATABASE_URL points at PostgreSQL
+
+DROP TABLE IF EXISTS users CASCADE;
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    username TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    user_type TEXT DEFAULT 'patient', -- patient, doctor, caregiver
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TABLE IF EXISTS assessments CASCADE;
+CREATE TABLE assessments (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    risk_score INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    wellness_score INTEGER NOT NULL,
+    wellness_level TEXT NOT NULL,
+    assessment_data TEXT NOT NULL, -- JSON string
+    causal_analysis TEXT NOT NULL, -- JSON string
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+DROP TABLE IF EXISTS mood_logs CASCADE;
+CREATE TABLE mood_logs (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    mood TEXT NOT NULL, -- Happy, Neutral, Sad, Anxious
+    notes TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+DROP TABLE IF EXISTS emergency_logs CASCADE;
+CREATE TABLE emergency_logs (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    emergency_type TEXT NOT NULL,
+    location_data TEXT, -- JSON string
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+DROP TABLE IF EXISTS doctor_patients CASCADE;
+CREATE TABLE doctor_patients (
+    id SERIAL PRIMARY KEY,
+    doctor_id INTEGER NOT NULL,
+    patient_id INTEGER NOT NULL,
+    relationship TEXT DEFAULT 'primary_care',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (doctor_id) REFERENCES users (id),
+    FOREIGN KEY (patient_id) REFERENCES users (id),
+    UNIQUE(doctor_id, patient_id)
+);
+
+DROP TABLE IF EXISTS appointments CASCADE;
+CREATE TABLE appointments (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    doctor_id INTEGER, -- NULL for requests not yet assigned to a doctor
+    appointment_type TEXT NOT NULL,
+    preferred_date DATE NOT NULL,
+    start_time TIMESTAMP, -- Booked slot, when a doctor was chosen
+    end_time TIMESTAMP,
+    notes TEXT,
+    status TEXT DEFAULT 'pending', -- pending, approved, rejected, confirmed, completed, cancelled
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (doctor_id) REFERENCES users (id)
+);
+
+-- At most one active appointment per doctor and slot
+CREATE UNIQUE INDEX idx_appointments_doctor_slot ON appointments (doctor_id, start_time)
+    WHERE status IN ('pending', 'approved', 'confirmed');
+CREATE INDEX idx_appointments_user ON appointments (user_id, preferred_date);
+CREATE INDEX idx_appointments_status ON appointments (status, created_at);
+
+DROP TABLE IF EXISTS doctor_availability CASCADE;
+CREATE TABLE doctor_availability (
+    doctor_id INTEGER NOT NULL,
+    weekday INTEGER NOT NULL, -- 0 = Monday
+    start_time TEXT NOT NULL, -- HH:MM
+    end_time TEXT NOT NULL,
+    slot_minutes INTEGER NOT NULL DEFAULT 30,
+    PRIMARY KEY (doctor_id, weekday, start_time),
+    FOREIGN KEY (doctor_id) REFERENCES users (id)
+);
+
+DROP TABLE IF EXISTS health_metrics CASCADE;
+CREATE TABLE health_metrics (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    metric_type TEXT NOT NULL, -- weight, blood_pressure, memory_score, etc.
+    metric_value REAL NOT NULL,
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Insert default admin user (password: password123)
+INSERT INTO users (username, password, email, user_type) VALUES
+('admin', 'pbkdf2:sha256:600000$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8$LeehkU1BEoH4Km2u', 'admin@alzheimerapp.com', 'admin');
+
+-- Insert sample patient
+INSERT INTO users (username, password, email, user_type) VALUES
+('patient1', 'pbkdf2:sha256:600000$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8$LeehkU1BEoH4Km2u', 'patient1@example.com', 'patient');
+
+DROP TABLE IF EXISTS chatbot_conversations CASCADE;
+CREATE TABLE chatbot_conversations (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    user_message TEXT NOT NULL,
+    bot_response TEXT NOT NULL,
+    conversation_context TEXT, -- JSON string for context
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+CREATE INDEX idx_chatbot_conversations_user ON chatbot_conversations (user_id, id);
@@ -0,0 +1,109 @@
+"""JSON encoding cost of the hot responses
+
+Encodes the /calculate_risk, /chatbot and /dashboard_data payloads with
+Flask's jsonify, with json_codec on orjson, and with json_codec's stdlib
+fallback (what runs when orjson is not installed), and prints the time per
+response and the body size for each. json_codec copies the pre-encoded
+knowledge-base answers and causal analysis lines in as fragments; jsonify
+gets the same values as plain strings. The dashboard payload is a full one
+(five assessments, a week of moods) with the datetimes PostgreSQL returns.
+
+    python scripts/json_encoding.py
+    python scripts/json_encoding.py --repeat 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec  # noqa: E402
+from app import (KNOWLEDGE_BASE_FRAGMENTS, app, encoded_causal_analysis, generate_causal_analysis,  # noqa: E402
+                 get_chatbot_response, get_related_queries)
+from flask import jsonify  # noqa: E402
+
+ASSESSMENT = {
+    'memory_loss': 'Often', 'age_group': '65-74', 'problem_solving': 'Sometimes', 'disorientation': 'Rarely',
+    'mood_swings': 'Often', 'family_history': 'Yes', 'poor_judgment': 'Sometimes',
+    'wellness': {'sleep_quality': 3, 'mood_level': 4, 'social_engagement': 'Rarely'},
+}
+CHAT_MESSAGE = 'What are the early symptoms of memory loss?'
+
+
+def dashboard_payload():
+    """/dashboard_data at its largest, shaped like load_dashboard_data's result"""
+    now = datetime.now()
+    assessments = [{'risk_score': 40 + i, 'risk_level': 'Moderate Risk', 'wellness_score': 12,
+                    'wellness_level': 'Moderate Wellness', 'created_at': now - timedelta(days=7 * i)}
+                   for i in range(5)]
+    moods = ['Happy', 'Calm', 'Anxious', 'Sad', 'Confused']
+    return {
+        'username': 'patient1',
+        'latest_assessment': assessments[0],
+        'recent_assessments': assessments,
+        'mood_trends': {mood: 6 - i for i, mood in enumerate(moods)},
+        'recent_moods': [{'mood': moods[i % len(moods)], 'notes': 'Went for a walk after lunch',
+                          'timestamp': now - timedelta(days=i)} for i in range(7)],
+    }
+
+
+def payloads():
+    """(name, body with fragments as json_codec sees it, the same body as plain values for jsonify)"""
+    risk = {'risk_score': 55, 'risk_level': 'Moderate Risk', 'wellness_score': 15,
+            'wellness_level': 'High Wellness'}
+    answer = get_chatbot_response(CHAT_MESSAGE)
+    chat = {'related_queries': get_related_queries(CHAT_MESSAGE), 'can_answer': True, 'language': 'en',
+            'translated': False}
+    dashboard = dashboard_payload()
+
+    return [
+        ('calculate_risk', dict(risk, causal_analysis=encoded_causal_analysis(ASSESSMENT, 55)),
+         dict(risk, causal_analysis=generate_causal_analysis(ASSESSMENT, 55))),
+        ('chatbot', dict(chat, response=KNOWLEDGE_BASE_FRAGMENTS.get(answer, answer)), dict(chat, response=answer)),
+        ('dashboard_data', dashboard, dashboard),
+    ]
+
+
+def per_call_us(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def stdlib_dumps(body):
+    """json_codec.dumps as it runs without orjson"""
+    dumps = json_codec._dumps
+    json_codec._dumps = json_codec._stdlib_dumps
+    try:
+        return json_codec.dumps(body)
+    finally:
+        json_codec._dumps = dumps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20000, help='Encodings per payload and encoder')
+    args = parser.parse_args()
+
+    encoders = [('jsonify', None), ('json_codec, stdlib', stdlib_dumps)]
+    if json_codec.orjson is not None:
+        encoders.insert(1, ('json_codec, orjson', json_codec.dumps))
+    else:
+        print('orjson is not installed; json_codec uses the stdlib fallback')
+
+    with app.app_context():
+        for name, body, plain in payloads():
+            for encoder, dumps in encoders:
+                if dumps is None:
+                    encode = lambda: jsonify(plain).get_data()  # noqa: E731
+                else:
+                    encode = lambda: dumps(body)  # noqa: E731
+                print(f'{name:15} {encoder:20} {per_call_us(encode, args.repeat):7.1f} µs  {len(encode()):6,} bytes')
+
+
+if __name__ == '__main__':
+    main()
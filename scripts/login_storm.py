@@ -0,0 +1,113 @@
+"""Dashboard latency during a login storm
+
+Polls /dashboard_data as a logged-in patient, first on its own and then while
+a crowd of clients logs in concurrently, and prints the latency percentiles
+for both phases. With hashing in the bounded pool the dashboard p99 should
+stay close to the baseline; logins beyond the pool's queue get a fast 503.
+
+    gunicorn app:app --worker-class gthread --threads 8 --workers 1 --bind 127.0.0.1:8000
+    python scripts/login_storm.py --url http://127.0.0.1:8000
+"""
+
+import argparse
+import http.cookiejar
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+
+def register(base_url, username, password):
+    """Create the test account; an existing one is reused"""
+    body = json.dumps({'username': username, 'password': password, 'email': f'{username}@example.com'}).encode()
+    request = urllib.request.Request(f'{base_url}/register', data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        if e.code != 400:
+            raise
+
+
+def client(base_url, username, password):
+    """urllib opener holding a logged-in session"""
+    cookies = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+    login(opener, base_url, username, password)
+    if not any(cookie.name == 'session' for cookie in cookies):
+        raise SystemExit(f'Could not log in as {username}')
+    return opener
+
+
+def login(opener, base_url, username, password):
+    """POST /login; returns the HTTP status"""
+    data = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+    try:
+        with opener.open(f'{base_url}/login', data=data, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float('nan')
+
+
+def poll_dashboard(opener, base_url, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        with opener.open(f'{base_url}/dashboard_data', timeout=30) as response:
+            response.read()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def storm(base_url, username, password, stop, statuses):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    while not stop.is_set():
+        statuses[login(opener, base_url, username, password)] += 1
+
+
+def measure(base_url, dashboard, duration, pollers, storm_clients, username, password):
+    stop = threading.Event()
+    latencies = []
+    statuses = Counter()
+    threads = [threading.Thread(target=poll_dashboard, args=(dashboard, base_url, stop, latencies))
+               for _ in range(pollers)]
+    threads += [threading.Thread(target=storm, args=(base_url, username, password, stop, statuses))
+                for _ in range(storm_clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', default='storm_patient')
+    parser.add_argument('--password', default='storm-password')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per phase')
+    parser.add_argument('--pollers', type=int, default=2, help='Concurrent dashboard clients')
+    parser.add_argument('--logins', type=int, default=32, help='Concurrent login clients during the storm')
+    args = parser.parse_args()
+
+    register(args.url, args.username, args.password)
+    dashboard = client(args.url, args.username, args.password)
+    for phase, storm_clients in (('baseline', 0), ('login storm', args.logins)):
+        latencies, statuses = measure(args.url, dashboard, args.duration, args.pollers, storm_clients,
+                                      args.username, args.password)
+        print(f'{phase}: {len(latencies)} dashboard requests, '
+              f'p50 {percentile(latencies, 0.50):.1f} ms, p99 {percentile(latencies, 0.99):.1f} ms'
+              + (f', logins by status {dict(statuses)}' if statuses else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Page rendering cost and bytes sent for the pre-rendered pages
+
+For each page served through StaticPages it prints the time per request of
+rendering the template with render_template against serving the cached
+StaticPages.render response, and the bytes on the wire for identity, gzip
+and (when brotli is installed) br encodings. The same byte counts follow for
+the fingerprinted JS/CSS assets the pages link to.
+
+    python scripts/static_pages_benchmark.py
+    python scripts/static_pages_benchmark.py --repeat 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template  # noqa: E402
+
+from app import app, static_pages  # noqa: E402
+from static_pages import COMPRESSIBLE_ASSETS, brotli  # noqa: E402
+
+PAGES = ('dashboard.html', 'assessment.html')
+ENCODINGS = ('identity', 'gzip') + (('br',) if brotli is not None else ())
+
+
+def per_call_us(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def sizes(serve):
+    """Body bytes of serve()'s response for a client accepting each encoding"""
+    sent = []
+    for encoding in ENCODINGS:
+        with app.test_request_context('/', headers={'Accept-Encoding': encoding}):
+            sent.append(f'{encoding} {len(serve().get_data()):,} B')
+    return ', '.join(sent)
+
+
+def assets():
+    """Compressible files under static/, relative to it"""
+    for root, _, files in os.walk(app.static_folder):
+        for name in sorted(files):
+            if name.endswith(COMPRESSIBLE_ASSETS):
+                yield os.path.relpath(os.path.join(root, name), app.static_folder).replace(os.sep, '/')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help='Requests timed per page and method')
+    args = parser.parse_args()
+
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip, br'}):
+        for page in PAGES:
+            rendered = per_call_us(lambda: render_template(page).encode('utf-8'), args.repeat)
+            cached = per_call_us(lambda: static_pages.render(page), args.repeat)
+            print(f'{page:18} render_template {rendered:8.1f} µs, StaticPages.render {cached:6.1f} µs; '
+                  f'{sizes(lambda: static_pages.render(page))}')
+
+    for filename in assets():
+        print(f'{filename:30} {sizes(lambda: static_pages.serve_static(filename))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+# Full-text search over chatbot conversations and free-text notes
+# On SQLite this uses FTS5 external-content tables kept in sync with their
+# source tables by triggers; on PostgreSQL it uses GIN expression indexes over
+# to_tsvector(). Either way searches never scan the base tables.
+
+import html
+import os
+import re
+
+# source name -> (base table, indexed columns, timestamp column)
+SEARCH_SOURCES = {
+    'chat': ('chatbot_conversations', ('user_message', 'bot_response'), 'created_at'),
+    'mood': ('mood_logs', ('notes',), 'timestamp'),
+    'appointments': ('appointments', ('notes',), 'created_at'),
+}
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+SNIPPET_TOKENS = 12
+PG_TEXT_CONFIG = 'english'
+SEARCH_RANK_LIMIT = int(os.environ.get('SEARCH_RANK_LIMIT', 20000))  # Matches per source above which results are newest first
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+def _fts_script(table, columns):
+    fts = _fts_table(table)
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f'new.{c}' for c in columns)
+    old_cols = ', '.join(f'old.{c}' for c in columns)
+    return f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+        );
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+        END;
+    '''
+
+
+def _pg_document(columns, alias=''):
+    return " || ' ' || ".join(f"coalesce({alias}{c}, '')" for c in columns)
+
+
+def _pg_vector(columns, alias=''):
+    return f"to_tsvector('{PG_TEXT_CONFIG}', {_pg_document(columns, alias)})"
+
+
+def ensure_search_index(db):
+    """Create the full-text indexes, backfilling any table indexed for the first time"""
+    if db.dialect == 'postgresql':
+        for table, columns, _ in SEARCH_SOURCES.values():
+            db.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_fts ON {table} USING GIN ({_pg_vector(columns)})')
+        db.commit()
+        return
+
+    existing = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, columns, _ in SEARCH_SOURCES.values():
+        if table not in existing:
+            continue
+        fts = _fts_table(table)
+        db.executescript(_fts_script(table, columns))
+        if fts not in existing:
+            db.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    db.commit()
+
+
+def build_pg_query(text):
+    """Turn free text into a to_tsquery() expression: all words required, last one prefix-matched"""
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    return ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+
+
+def build_match_query(text):
+    """Turn free text into a safe FTS5 query: every term quoted, last term prefix-matched"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _match_clause(db, source):
+    """(FROM ... WHERE ... fragment over the source, id expression) for a full-text match on one `?`"""
+    table, columns, _ = SEARCH_SOURCES[source]
+    if db.dialect == 'postgresql':
+        return f"{table} t WHERE {_pg_vector(columns, 't.')} @@ to_tsquery('{PG_TEXT_CONFIG}', ?)", 't.id'
+    fts = _fts_table(table)
+    return f'{fts} WHERE {fts} MATCH ?', f'{fts}.rowid'
+
+
+def _count(db, source, match):
+    """Matches in one source; no ranking, joins or snippets"""
+    clause, _ = _match_clause(db, source)
+    return db.execute(f'SELECT COUNT(*) FROM {clause}', (match,)).fetchone()[0]
+
+
+def _candidates(db, source, match, limit, by_recency):
+    """Top `limit` (id, sort key) pairs from one source: bm25/ts_rank score, or timestamp by recency"""
+    table, columns, ts_column = SEARCH_SOURCES[source]
+    clause, id_expr = _match_clause(db, source)
+    if by_recency:
+        # Newest ids first; the index walk stops after `limit` rows instead of scoring every match
+        if db.dialect == 'postgresql':
+            sql = f'SELECT t.id, t.{ts_column} AS sort_key FROM {clause} ORDER BY t.id DESC LIMIT ?'
+        else:
+            sql = f'''
+                SELECT m.id, t.{ts_column} AS sort_key
+                FROM (SELECT {id_expr} AS id FROM {clause} ORDER BY {id_expr} DESC LIMIT ?) m
+                JOIN {table} t ON t.id = m.id
+            '''
+    elif db.dialect == 'postgresql':
+        vector = _pg_vector(columns, 't.')
+        sql = (f"SELECT t.id, -ts_rank({vector}, to_tsquery('{PG_TEXT_CONFIG}', ?)) AS sort_key "
+               f'FROM {clause} ORDER BY sort_key LIMIT ?')
+        return [(row[0], row[1]) for row in db.execute(sql, (match, match, limit))]
+    else:
+        # FTS5's rank column is bm25(); lower is better
+        sql = f'SELECT {id_expr} AS id, rank AS sort_key FROM {clause} ORDER BY rank LIMIT ?'
+    return [(row[0], row[1]) for row in db.execute(sql, (match, limit))]
+
+
+def _details(db, source, match, ids):
+    """Username, timestamp and highlighted snippet for the ids on the current page"""
+    table, columns, ts_column = SEARCH_SOURCES[source]
+    placeholders = ', '.join('?' * len(ids))
+    if db.dialect == 'postgresql':
+        headline = f'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords={SNIPPET_TOKENS}, MinWords=4'
+        sql = f'''
+            SELECT t.id, t.user_id, u.username, t.{ts_column} AS created_at,
+                   ts_headline('{PG_TEXT_CONFIG}', {_pg_document(columns, 't.')},
+                               to_tsquery('{PG_TEXT_CONFIG}', ?), ?) AS snippet
+            FROM {table} t
+            JOIN users u ON u.id = t.user_id
+            WHERE t.id IN ({placeholders})
+        '''
+        params = [match, headline] + list(ids)
+    else:
+        fts = _fts_table(table)
+        # FTS5 only narrows a MATCH by a rowid range; an IN on rowid makes the planner drop the range
+        # and walk every match, so the unary + keeps IN as a plain filter on the bounded scan
+        sql = f'''
+            SELECT t.id, t.user_id, u.username, t.{ts_column} AS created_at,
+                   snippet({fts}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '...', {SNIPPET_TOKENS}) AS snippet
+            FROM {fts}
+            CROSS JOIN {table} t ON t.id = {fts}.rowid
+            CROSS JOIN users u ON u.id = t.user_id
+            WHERE {fts} MATCH ? AND {fts}.rowid BETWEEN ? AND ? AND +{fts}.rowid IN ({placeholders})
+        '''
+        params = [match, min(ids), max(ids)] + list(ids)
+    return {row['id']: dict(row) for row in db.execute(sql, params)}
+
+
+def _highlight(snippet):
+    """Escape snippet text for HTML and turn the FTS markers into <mark> tags"""
+    return html.escape(snippet or '').replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+
+def search(db, text, sources=None, page=1, per_page=20):
+    """Ranked, paginated search across the indexed sources
+
+    Totals come from a bare count per source, each source contributes its own
+    top page*per_page candidates, and snippets and usernames are only looked up
+    for the page returned. Terms matching more than SEARCH_RANK_LIMIT rows in a
+    source are ordered newest first instead of by relevance, since scoring every
+    match of a very common word costs more than it tells the reader.
+    """
+    sources = [s for s in (sources or SEARCH_SOURCES) if s in SEARCH_SOURCES]
+    match = build_pg_query(text) if db.dialect == 'postgresql' else build_match_query(text)
+    if not match or not sources:
+        return {'results': [], 'total': 0, 'page': page, 'per_page': per_page, 'order': 'rank'}
+
+    counts = {source: _count(db, source, match) for source in sources}
+    total = sum(counts.values())
+    by_recency = max(counts.values()) > SEARCH_RANK_LIMIT
+    window = page * per_page
+
+    candidates = []
+    for source in sources:
+        if counts[source]:
+            candidates.extend((sort_key, source, row_id)
+                              for row_id, sort_key in _candidates(db, source, match, window, by_recency))
+    if by_recency:
+        # Ids are not comparable across tables, so sources are merged by timestamp
+        candidates.sort(key=lambda c: (str(c[0]), c[1], c[2]), reverse=True)
+    else:
+        candidates.sort()
+    page_rows = candidates[(page - 1) * per_page:window]
+
+    by_source = {}
+    for _, source, row_id in page_rows:
+        by_source.setdefault(source, []).append(row_id)
+    details = {source: _details(db, source, match, ids) for source, ids in by_source.items()}
+
+    results = []
+    for sort_key, source, row_id in page_rows:
+        detail = details[source].get(row_id)
+        if detail is None:  # Deleted between the ranking and detail queries
+            continue
+        results.append({
+            'source': source,
+            'id': row_id,
+            'user_id': detail['user_id'],
+            'username': detail['username'],
+            'created_at': detail['created_at'],
+            'snippet': _highlight(detail['snippet']),
+            'rank': None if by_recency else round(float(sort_key), 4),
+        })
+
+    return {'results': results, 'total': total, 'page': page, 'per_page': per_page,
+            'order': 'recent' if by_recency else 'rank'}
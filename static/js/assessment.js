@@ -0,0 +1,264 @@
+document.getElementById('assessmentForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const formData = new FormData(this);
+    const assessmentData = {};
+
+    // Collect risk factors
+    assessmentData.memory_loss = formData.get('memory_loss');
+    assessmentData.age_group = formData.get('age_group');
+    assessmentData.problem_solving = formData.get('problem_solving');
+    assessmentData.disorientation = formData.get('disorientation');
+    assessmentData.mood_swings = formData.get('mood_swings');
+    assessmentData.family_history = formData.get('family_history');
+    assessmentData.poor_judgment = formData.get('poor_judgment');
+
+    // Collect wellness factors
+    assessmentData.wellness = {
+        sleep_quality: formData.get('sleep_quality'),
+        mood_level: formData.get('mood_level'),
+        social_engagement: formData.get('social_engagement')
+    };
+
+    // Validate required fields
+    const requiredFields = ['memory_loss', 'age_group', 'problem_solving', 'disorientation', 'mood_swings', 'family_history', 'poor_judgment'];
+    const wellnessFields = ['sleep_quality', 'mood_level', 'social_engagement'];
+
+    let isValid = true;
+    for (let field of requiredFields) {
+        if (!assessmentData[field]) {
+            isValid = false;
+            alert(`Please select ${field.replace('_', ' ')}`);
+            break; // Exit the loop
+        }
+    }
+
+    if (!isValid) return; // Exit the function
+
+    // Validate wellness fields
+    for (let field of wellnessFields) {
+        if (!assessmentData.wellness[field]) {
+            isValid = false;
+            alert(`Please select ${field.replace('_', ' ')}`);
+            break; // Exit the loop
+        }
+    }
+
+    if (!isValid) return; // Exit the function
+    console.log('Sending data to backend:', assessmentData); // Debug log
+    fetch('/calculate_risk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(assessmentData)
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        console.log('Received data:', data); // Debug log
+        displayResults(data);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error calculating risk. Please check your internet connection and try again.');
+    });
+});
+
+function displayResults(data) {
+    console.log('Displaying results:', data); // Debug log
+
+    // Show results container
+    document.getElementById('resultsContainer').style.display = 'block';
+
+    // Update risk score display
+    const riskScoreElement = document.getElementById('riskScore');
+    const riskLevelElement = document.getElementById('riskLevel');
+    const riskScoreValueElement = document.getElementById('riskScoreValue');
+
+    if (riskScoreElement && data.risk_score !== undefined) {
+        riskScoreElement.textContent = data.risk_score;
+        console.log('Updated risk score:', data.risk_score);
+    }
+
+    if (riskScoreValueElement && data.risk_score !== undefined) {
+        riskScoreValueElement.textContent = data.risk_score;
+    }
+
+    if (riskLevelElement && data.risk_level) {
+        riskLevelElement.textContent = data.risk_level;
+        console.log('Updated risk level:', data.risk_level);
+    }
+
+    // Set risk level color
+    if (riskScoreElement && data.risk_level) {
+        riskScoreElement.className = 'risk-score';
+        if (data.risk_level === 'Low Risk') {
+            riskScoreElement.classList.add('risk-low');
+        } else if (data.risk_level === 'Moderate Risk') {
+            riskScoreElement.classList.add('risk-moderate');
+        } else {
+            riskScoreElement.classList.add('risk-high');
+        }
+    }
+
+    // Update wellness score
+    const wellnessScoreElement = document.getElementById('wellnessScore');
+    const wellnessLevelElement = document.getElementById('wellnessLevel');
+
+    if (wellnessScoreElement && data.wellness_score !== undefined) {
+        wellnessScoreElement.textContent = `${data.wellness_score}/20`;
+        console.log('Updated wellness score:', data.wellness_score);
+    }
+
+    if (wellnessLevelElement && data.wellness_level) {
+        wellnessLevelElement.textContent = data.wellness_level;
+        console.log('Updated wellness level:', data.wellness_level);
+    }
+
+    // Display causal analysis
+    if (data.causal_analysis) {
+        displayCausalAnalysis(data.causal_analysis);
+        console.log('Updated causal analysis');
+    }
+
+    // Generate prevention plan
+    if (data.risk_score !== undefined && data.risk_level) {
+        generatePreventionPlan(data);
+        console.log('Updated prevention plan');
+    }
+
+    // Get predictive alerts
+    if (data.risk_score !== undefined) {
+        getPredictiveAlerts(data.risk_score);
+        console.log('Updated predictive alerts');
+    }
+
+    // Re-enable button
+    const button = document.querySelector('.btn-calculate');
+    if (button) {
+        button.disabled = false;
+        button.innerHTML = '<i class="fas fa-calculator me-2"></i>Calculate Risk & Get Analysis';
+    }
+
+    console.log('Results display completed');
+}
+
+function displayCausalAnalysis(analysis) {
+    const container = document.getElementById('causalAnalysis');
+    if (container && analysis) {
+        container.innerHTML = analysis.map(line => `<p>${line}</p>`).join('');
+        console.log('Causal analysis displayed successfully');
+    } else {
+        console.error('Causal analysis container not found or analysis data missing');
+    }
+}
+
+function generatePreventionPlan(data) {
+    const container = document.getElementById('preventionPlan');
+    if (!container) {
+        console.error('Prevention plan container not found');
+        return;
+    }
+
+    let plan = '';
+
+    if (data.risk_level === 'High Risk') {
+        plan += '<div class="alert alert-danger"><strong>Medical consultation recommended</strong></div>';
+    }
+
+    if (data.risk_score > 20) {
+        plan += '<p><i class="fas fa-brain text-primary me-2"></i>Memory training exercises recommended</p>';
+    }
+
+    if (data.wellness_score < 10) {
+        plan += '<p><i class="fas fa-heart text-danger me-2"></i>Stress management techniques needed</p>';
+    }
+
+    plan += '<p><i class="fas fa-running text-success me-2"></i>Regular exercise routine</p>';
+    plan += '<p><i class="fas fa-utensils text-info me-2"></i>Brain-healthy diet</p>';
+    plan += '<p><i class="fas fa-users text-warning me-2"></i>Maintain social engagement</p>';
+    plan += '<p><i class="fas fa-bed text-secondary me-2"></i>Quality sleep schedule</p>';
+
+    container.innerHTML = plan;
+    console.log('Prevention plan generated successfully');
+}
+
+function getPredictiveAlerts(currentRisk) {
+    const container = document.getElementById('predictiveAlerts');
+    if (!container) {
+        console.error('Predictive alerts container not found');
+        return;
+    }
+
+    fetch('/predictive_alerts', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ current_risk: currentRisk })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.alerts && data.alerts.length > 0) {
+            container.innerHTML = data.alerts.map(alert =>
+                `<div class="alert alert-warning"><strong>${alert.type}:</strong> ${alert.message}</div>`
+            ).join('');
+        } else {
+            container.innerHTML = '<p class="text-success">No immediate risk alerts. Continue monitoring.</p>';
+        }
+        console.log('Predictive alerts updated successfully');
+    })
+    .catch(error => {
+        console.error('Error getting predictive alerts:', error);
+        container.innerHTML = '<p class="text-muted">Unable to load predictive alerts.</p>';
+    });
+}
+
+function retakeAssessment() {
+    document.getElementById('assessmentForm').reset();
+    document.getElementById('resultsContainer').style.display = 'none';
+}
+
+function generatePDF() {
+    alert('PDF generation would be implemented here with reportlab');
+}
+
+function consultDoctor() {
+    alert('Doctor consultation booking would be implemented here');
+}
+
+function changeLanguage() {
+    const language = document.getElementById('languageSelect').value;
+    if (language !== 'en') {
+        // Translate current page content in a single request
+        const elementsToTranslate = Array.from(document.querySelectorAll('h1, h4, h5, p, label, .btn'))
+            .filter(element => element.textContent.trim());
+
+        fetch('/translate_batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                texts: elementsToTranslate.map(element => element.textContent),
+                target_lang: language
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.translations) {
+                elementsToTranslate.forEach((element, i) => {
+                    element.textContent = data.translations[i];
+                });
+            }
+        })
+        .catch(error => {
+            console.error('Translation error:', error);
+        });
+    }
+}
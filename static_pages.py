@@ -0,0 +1,109 @@
+# Pre-rendered pages and fingerprinted static assets
+# Pages whose markup does not depend on the request are rendered once and kept
+# as pre-compressed bytes with an ETag; JS/CSS assets get a content hash in
+# their URL so browsers can cache them for a year.
+
+import gzip
+import hashlib
+import threading
+
+from flask import Response, render_template, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli  # Optional, only used when installed
+except ImportError:
+    brotli = None
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_ASSETS = ('.js', '.css', '.html', '.svg', '.json')
+
+
+class CompressedBody:
+    """Response body held in identity, gzip and (optionally) brotli encodings"""
+
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.encodings = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings['br'] = brotli.compress(body)
+
+    def response(self, cache_control):
+        """Serve the best encoding the client accepts, or 304 when its copy is current"""
+        headers = {'ETag': f'"{self.etag}"', 'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+        if self.etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in self.encodings and candidate in request.accept_encodings:
+                encoding = candidate
+                break
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.encodings[encoding], mimetype=self.mimetype, headers=headers)
+
+
+class StaticPages:
+    """Cache of pre-rendered templates and fingerprinted static files for an app"""
+
+    def __init__(self, app=None):
+        self._pages = {}
+        self._assets = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.jinja_env.globals['asset_url'] = self.asset_url
+        app.view_functions['static'] = self.serve_static
+
+    @property
+    def _reload(self):
+        # Pick up template and asset edits while developing
+        return self.app.debug
+
+    def _asset(self, filename):
+        asset = None if self._reload else self._assets.get(filename)
+        if asset is None:
+            path = safe_join(self.app.static_folder, filename)
+            if path is None:
+                raise FileNotFoundError(filename)
+            with open(path, 'rb') as f:
+                body = f.read()
+            mimetype = self.app.response_class.default_mimetype
+            if filename.endswith('.js'):
+                mimetype = 'text/javascript'
+            elif filename.endswith('.css'):
+                mimetype = 'text/css'
+            asset = CompressedBody(body, mimetype)
+            with self._lock:
+                self._assets[filename] = asset
+        return asset
+
+    def asset_url(self, filename):
+        """URL for a static file with its content hash, safe to cache indefinitely"""
+        return url_for('static', filename=filename, v=self._asset(filename).etag)
+
+    def serve_static(self, filename):
+        if not filename.endswith(COMPRESSIBLE_ASSETS):
+            return send_from_directory(self.app.static_folder, filename)
+        try:
+            asset = self._asset(filename)
+        except (FileNotFoundError, IsADirectoryError):
+            return Response(status=404)
+        if request.args.get('v') == asset.etag:
+            return asset.response(f'public, max-age={ASSET_MAX_AGE}, immutable')
+        return asset.response('no-cache')
+
+    def render(self, template):
+        """Serve a template rendered once; it must not depend on session or request data"""
+        page = None if self._reload else self._pages.get(template)
+        if page is None:
+            page = CompressedBody(render_template(template).encode('utf-8'), 'text/html')
+            with self._lock:
+                self._pages[template] = page
+        return page.response('private, no-cache')
@@ -0,0 +1,243 @@
+# Storage layer
+# Every route talks to the database through this module. The backend is chosen
+# from DATABASE_URL (SQLite by default, PostgreSQL in production) and
+# connections come from a SQLAlchemy-managed pool. SQL is written once with
+# `?` placeholders and translated for drivers that use a different paramstyle.
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+try:
+    import psycopg2
+    import psycopg2.extras
+except ImportError:  # Only needed when DATABASE_URL points at PostgreSQL
+    psycopg2 = None
+
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///alzheimer_app.db')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # Seconds to wait for a pooled connection
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # Milliseconds
+
+# Driver exceptions callers may want to catch without importing the driver
+DB_ERRORS = (sqlite3.Error,) + ((psycopg2.Error,) if psycopg2 else ())
+DB_INTEGRITY_ERRORS = (sqlite3.IntegrityError,) + ((psycopg2.IntegrityError,) if psycopg2 else ())
+# Locked database, query timeout, lost connection or exhausted pool
+DB_UNAVAILABLE_ERRORS = (sqlite3.OperationalError, PoolTimeout) + ((psycopg2.OperationalError,) if psycopg2 else ())
+
+SCHEMA_FILES = {
+    'sqlite': 'schema.sql',
+    'postgresql': 'schema_postgres.sql',
+}
+
+# Queries run on nearly every request; prepared once per pooled connection
+PREPARED_QUERIES = {
+    'user_by_username': 'SELECT * FROM users WHERE username = ?',
+    'recent_assessments': '''
+        SELECT risk_score, risk_level, wellness_score, wellness_level, created_at
+        FROM assessments
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''',
+    'mood_trends': '''
+        SELECT mood, COUNT(*) as count
+        FROM mood_logs
+        WHERE user_id = ? AND timestamp >= ?
+        GROUP BY mood
+        ORDER BY count DESC
+    ''',
+    'recent_moods': '''
+        SELECT mood, notes, timestamp
+        FROM mood_logs
+        WHERE user_id = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    ''',
+}
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+def _to_format_paramstyle(sql):
+    """Rewrite `?` placeholders as `%s` (and escape literal `%`) outside string literals"""
+    parts = _STRING_LITERAL.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].replace('%', '%%').replace('?', '%s')
+    for i in range(1, len(parts), 2):
+        parts[i] = parts[i].replace('%', '%%')
+    return ''.join(parts)
+
+
+def _to_numbered_params(sql):
+    """Rewrite `?` placeholders as $1, $2, ... for PREPARE"""
+    parts = _STRING_LITERAL.split(sql)
+    counter = iter(range(1, 1000))
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\?', lambda _: f'${next(counter)}', parts[i])
+    return ''.join(parts)
+
+
+class Connection:
+    """Pooled DB-API connection with a sqlite3-style interface for both backends"""
+
+    def __init__(self, storage, raw):
+        self.storage = storage
+        self.dialect = storage.dialect
+        self._raw = raw
+
+    def _sql(self, sql):
+        return _to_format_paramstyle(sql) if self.dialect == 'postgresql' else sql
+
+    def execute(self, sql, params=()):
+        cursor = self._raw.cursor()
+        cursor.execute(self._sql(sql), tuple(params))
+        return cursor
+
+    def executemany(self, sql, seq_of_params):
+        cursor = self._raw.cursor()
+        cursor.executemany(self._sql(sql), [tuple(p) for p in seq_of_params])
+        return cursor
+
+    def executescript(self, script):
+        if self.dialect == 'sqlite':
+            return self._raw.driver_connection.executescript(script)
+        cursor = self._raw.cursor()
+        cursor.execute(script)
+        return cursor
+
+    def insert(self, sql, params=()):
+        """Run an INSERT and return the new row id"""
+        if self.dialect == 'postgresql':
+            return self.execute(sql.rstrip().rstrip(';') + ' RETURNING id', params).fetchone()[0]
+        return self.execute(sql, params).lastrowid
+
+    def execute_prepared(self, name, params=()):
+        """Run one of PREPARED_QUERIES, preparing it on this connection the first time"""
+        if self.dialect == 'sqlite':
+            # sqlite3 keeps compiled statements in its per-connection statement cache
+            return self.execute(PREPARED_QUERIES[name], params)
+
+        prepared = self._raw.info.setdefault('prepared', set())
+        cursor = self._raw.cursor()
+        if name not in prepared:
+            cursor.execute(f'PREPARE {name} AS {_to_numbered_params(PREPARED_QUERIES[name])}')
+            prepared.add(name)
+        placeholders = ', '.join(['%s'] * len(params))
+        cursor.execute(f'EXECUTE {name} ({placeholders})' if params else f'EXECUTE {name}', tuple(params))
+        return cursor
+
+    @contextmanager
+    def timeout(self, seconds):
+        """Fail statements run inside the block with an OperationalError once `seconds` have passed"""
+        if self.dialect == 'sqlite':
+            raw = self._raw.driver_connection
+            deadline = time.monotonic() + seconds
+            # busy_timeout bounds the wait for a lock; the progress handler interrupts slow statements
+            raw.execute(f'PRAGMA busy_timeout = {int(seconds * 1000)}')
+            raw.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+            try:
+                yield self
+            finally:
+                raw.set_progress_handler(None, 0)
+                raw.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}')
+            return
+
+        cursor = self._raw.cursor()
+        cursor.execute('SET statement_timeout = %s', (int(seconds * 1000),))
+        try:
+            yield self
+        except DB_ERRORS:
+            # The failed transaction is aborted; rolling back also undoes the SET
+            self._raw.rollback()
+            raise
+        cursor.execute('SET statement_timeout = DEFAULT')
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        # Returns the connection to the pool
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+
+
+class Storage:
+    """Database backend selected from a SQLAlchemy URL"""
+
+    def __init__(self, url=DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                 pool_timeout=DB_POOL_TIMEOUT):
+        # Render and Heroku hand out postgres:// URLs, which SQLAlchemy no longer accepts
+        if url.startswith('postgres://'):
+            url = 'postgresql://' + url[len('postgres://'):]
+        self.url = url
+
+        if url.startswith('sqlite'):
+            self.dialect = 'sqlite'
+            self.engine = create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+                                        connect_args={'check_same_thread': False, 'cached_statements': 256})
+            event.listen(self.engine, 'connect', self._configure_sqlite)
+        else:
+            self.dialect = 'postgresql'
+            self.engine = create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+                                        pool_pre_ping=True, connect_args={'cursor_factory': psycopg2.extras.DictCursor})
+
+    @staticmethod
+    def _configure_sqlite(dbapi_connection, connection_record):
+        dbapi_connection.row_factory = sqlite3.Row
+        dbapi_connection.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}')
+        dbapi_connection.execute('PRAGMA journal_mode = WAL')
+        dbapi_connection.execute('PRAGMA synchronous = NORMAL')
+
+    @property
+    def schema_file(self):
+        return SCHEMA_FILES[self.dialect]
+
+    @property
+    def sqlite_path(self):
+        return self.engine.url.database if self.dialect == 'sqlite' else None
+
+    def connect(self):
+        return Connection(self, self.engine.raw_connection())
+
+    def is_initialized(self):
+        """True when the users table exists"""
+        if self.dialect == 'sqlite':
+            path = self.sqlite_path
+            if path and path != ':memory:' and not os.path.exists(path):
+                return False
+            sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        else:
+            sql = "SELECT 1 FROM information_schema.tables WHERE table_name = 'users'"
+        db = self.connect()
+        try:
+            return db.execute(sql).fetchone() is not None
+        finally:
+            db.close()
+
+    def run_script(self, script):
+        db = self.connect()
+        try:
+            db.executescript(script)
+            db.commit()
+        finally:
+            db.close()
+
+    def reset(self):
+        """Drop pooled connections and, for SQLite, the database file itself"""
+        self.engine.dispose()
+        path = self.sqlite_path
+        if path and path != ':memory:':
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
@@ -0,0 +1,55 @@
+# Storage tests run once per backend. PostgreSQL comes from TEST_DATABASE_URL
+# (e.g. a throwaway container) or, when that is unset, from a local pgserver
+# instance; without either the PostgreSQL cases are skipped.
+
+import os
+
+import pytest
+
+from notifications import ensure_notification_tables
+from retention import ensure_retention_tables
+from storage import Storage
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def postgres_url(tmp_path_factory):
+    url = os.environ.get('TEST_DATABASE_URL')
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError:
+        pytest.skip('Set TEST_DATABASE_URL or install pgserver to run the PostgreSQL tests')
+    server = pgserver.get_server(tmp_path_factory.mktemp('pgdata'))
+    yield server.get_uri()
+    server.cleanup()
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def backend(request, tmp_path):
+    """Storage with a freshly loaded schema"""
+    if request.param == 'sqlite':
+        storage = Storage(f'sqlite:///{tmp_path / "test.db"}')
+    else:
+        storage = Storage(request.getfixturevalue('postgres_url'))
+        storage.run_script('DROP SCHEMA public CASCADE; CREATE SCHEMA public;')
+
+    with open(os.path.join(REPO_DIR, storage.schema_file)) as f:
+        storage.run_script(f.read())
+    db = storage.connect()
+    ensure_notification_tables(db)
+    ensure_retention_tables(db)
+    db.close()
+
+    yield storage
+    storage.engine.dispose()
+
+
+@pytest.fixture
+def db(backend):
+    connection = backend.connect()
+    yield connection
+    connection.rollback()
+    connection.close()
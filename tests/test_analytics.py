@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from analytics import MISSING, CohortSnapshot, query_snapshot  # noqa: E402
+
+RISK_FACTORS = {
+    'memory_loss': {'None': 0, 'Mild': 10, 'Moderate': 20, 'Severe': 30},
+    'family_history': {'No': 0, 'Yes': 10},
+}
+
+
+def _add_assessment(db, user_id, answers, wellness_score=10):
+    db.execute('''
+        INSERT INTO assessments (user_id, risk_score, risk_level, wellness_score, wellness_level,
+                                 assessment_data, causal_analysis, created_at)
+        VALUES (?, 20, 'Low Risk', ?, 'Moderate Wellness', ?, '[]', '2026-03-01 10:00:00')
+    ''', (user_id, wellness_score, json.dumps(answers)))
+
+
+def test_out_of_range_answers_are_coded_missing(db, tmp_path):
+    user_id = db.execute("SELECT id FROM users WHERE username = 'patient1'").fetchone()['id']
+    _add_assessment(db, user_id, {'memory_loss': 'Mild', 'family_history': 'Yes',
+                                  'wellness': {'sleep_quality': 4, 'mood_level': '3'}})
+    # What /calculate_risk stores for sleep_quality=1000 / mood_level=-100000
+    _add_assessment(db, user_id, {'memory_loss': 'Severe', 'family_history': 'Maybe',
+                                  'wellness': {'sleep_quality': 1000, 'mood_level': -100000}},
+                    wellness_score=-199978)
+    _add_assessment(db, user_id, {'memory_loss': 'None', 'wellness': {'sleep_quality': 2, 'mood_level': 5}})
+    db.commit()
+
+    snapshot = CohortSnapshot(RISK_FACTORS, directory=str(tmp_path / 'analytics'))
+    # Chunks of two put the bad row in the first chunk, which used to fail every run
+    assert snapshot.append(db, chunk_size=2) == 3
+    assert snapshot.append(db, chunk_size=2) == 0
+
+    columns, meta = snapshot.load()
+    assert meta['rows'] == 3
+    assert columns['sleep_quality'].tolist() == [4, MISSING, 2]
+    assert columns['mood_level'].tolist() == [3, MISSING, 5]
+    assert columns['wellness_score'].tolist() == [10, MISSING, 10]
+    assert columns['memory_loss'].tolist() == [1, 3, 0]
+    assert columns['family_history'].tolist() == [1, MISSING, MISSING]
+    assert query_snapshot(snapshot, 'summary')['result']['assessments'] == 3
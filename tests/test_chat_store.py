@@ -0,0 +1,40 @@
+from chat_store import ChatHistoryStore
+
+
+def _patient_id(db):
+    return db.execute("SELECT id FROM users WHERE username = 'patient1'").fetchone()['id']
+
+
+def test_append_never_reads_the_database():
+    def connect():
+        raise AssertionError('append must not touch the database for anonymous chats')
+
+    store = ChatHistoryStore(connect, history_limit=2)
+    for i in range(3):
+        store.append('chat', f'question {i}', 'answer')
+    assert [exchange['user'] for exchange in store.history('chat')] == ['question 1', 'question 2']
+
+
+def test_buffers_are_bounded_by_message_size():
+    store = ChatHistoryStore(lambda: None, history_limit=5, max_chars=100)
+    store.append('old', 'x' * 40, 'y' * 20)
+    store.append('new', 'x' * 40, 'y' * 20)
+    assert store.history('old') == []  # Evicted to stay under max_chars
+    assert len(store.history('new')) == 1
+
+    store.drop('new')
+    store.append('other', 'x' * 40, 'y' * 20)
+    assert len(store.history('other')) == 1
+
+
+def test_history_of_an_unseen_conversation_is_reloaded(backend, db):
+    user_id = _patient_id(db)
+    writer = ChatHistoryStore(backend.connect, batch_size=100)
+    writer.append('chat', 'what is dementia?', 'an answer', user_id=user_id)
+    writer.flush()
+
+    # Another worker, or this one after a restart, has no buffer for the conversation
+    reader = ChatHistoryStore(backend.connect)
+    history = reader.history('chat', user_id)
+    assert [(exchange['user'], exchange['bot']) for exchange in history] == [('what is dementia?', 'an answer')]
+    assert reader.history('anonymous') == []
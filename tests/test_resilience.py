@@ -0,0 +1,92 @@
+import pytest
+
+from resilience import CircuitBreaker, GuardedReads, ReadUnavailable
+from storage import Storage
+
+SLOW_QUERY = {
+    'sqlite': '''
+        WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000)
+        SELECT COUNT(*) FROM n
+    ''',
+    'postgresql': 'SELECT pg_sleep(5)',
+}
+
+
+def _guarded(backend, threshold=2):
+    return GuardedReads(backend.connect, timeout=0.2,
+                        breaker=CircuitBreaker(failure_threshold=threshold, reset_timeout=60))
+
+
+def _count_users(db):
+    return db.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+
+
+def test_slow_query_serves_stale_then_opens_breaker(backend):
+    guarded = _guarded(backend)
+    key = ('users', 0)
+    connections = []
+
+    def db_factory():
+        connections.append(backend.connect())
+        return connections[-1]
+
+    live, age = guarded.fetch(key, _count_users, db_factory)
+    assert age is None
+
+    def slow(db):
+        return db.execute(SLOW_QUERY[backend.dialect]).fetchone()[0]
+
+    # Both slow reads hit the per-query timeout and fall back to the last good value
+    for _ in range(2):
+        value, age = guarded.fetch(key, slow, db_factory)
+        assert value == live and age is not None
+    assert guarded.breaker.state == 'open'
+
+    # An open breaker answers from the cache without asking for a connection
+    opened = len(connections)
+    assert guarded.fetch(key, slow, db_factory)[0] == live
+    assert len(connections) == opened
+    with pytest.raises(ReadUnavailable):
+        guarded.fetch(('users', 1), _count_users, db_factory)
+
+    for db in connections:
+        db.close()
+
+
+def test_pool_exhaustion_trips_breaker(backend):
+    storage = Storage(backend.url, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    guarded = _guarded(storage, threshold=1)
+    key = ('users', 0)
+    db = storage.connect()
+    live, _ = guarded.fetch(key, _count_users, lambda: db)
+    db.close()
+
+    held = storage.connect()  # The only pooled connection is busy
+    try:
+        value, age = guarded.fetch(key, _count_users, storage.connect)
+        assert value == live and age is not None
+        assert guarded.breaker.state == 'open'
+    finally:
+        held.close()
+        storage.engine.dispose()
+
+    # Once the database answers again the background refresh closes the breaker
+    guarded.breaker.reset_timeout = 0
+    assert guarded.refresh_pending() == 1
+    assert guarded.breaker.state == 'closed'
+
+
+def test_wal_writer_lock_does_not_block_reads(backend):
+    if backend.dialect != 'sqlite':
+        pytest.skip('WAL reader/writer behaviour is SQLite-specific')
+    guarded = _guarded(backend, threshold=1)
+    writer = backend.connect()
+    writer.execute('BEGIN EXCLUSIVE')
+    try:
+        # Under WAL readers see the last committed snapshot, so a held write lock is not an outage
+        value, age = guarded.fetch(('users', 0), _count_users, backend.connect)
+        assert age is None and value > 0
+        assert guarded.breaker.state == 'closed'
+    finally:
+        writer.rollback()
+        writer.close()
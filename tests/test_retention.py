@@ -0,0 +1,27 @@
+from retention import _append_archive, query_archive
+
+
+def _archive(tmp_path, ids):
+    rows = [{'id': i, 'user_id': 1 + i % 2, 'mood': 'Happy', 'timestamp': f'2024-03-01 10:00:{i:02d}'} for i in ids]
+    _append_archive('mood_logs', rows, 'timestamp', str(tmp_path))
+
+
+def test_archive_pages_follow_the_cursor_and_skip_retried_chunks(tmp_path):
+    _archive(tmp_path, range(1, 6))
+    _archive(tmp_path, range(1, 6))  # A chunk re-archived after its delete failed
+    _archive(tmp_path, range(6, 11))
+
+    pages, after = [], None
+    while True:
+        rows, after = query_archive('mood_logs', '2024-03', after_id=after, limit=3, archive_dir=str(tmp_path))
+        pages.append([row['id'] for row in rows])
+        if after is None:
+            break
+    assert pages == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]
+
+    rows, after = query_archive('mood_logs', '2024-03', user_id=2, limit=10, archive_dir=str(tmp_path))
+    assert [row['id'] for row in rows] == [1, 3, 5, 7, 9] and after is None
+
+
+def test_missing_archive_month_is_an_empty_page(tmp_path):
+    assert query_archive('mood_logs', '2023-01', archive_dir=str(tmp_path)) == ([], None)
@@ -0,0 +1,129 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduling import Scheduler, SlotUnavailable
+
+WHOLE_WEEK = [{'weekday': day, 'start': '08:00', 'end': '18:00', 'slot_minutes': 30} for day in range(7)]
+
+
+@pytest.fixture
+def doctor(db):
+    doctor_id = db.insert('INSERT INTO users (username, password, email, user_type) VALUES (?, ?, ?, ?)',
+                          ('dr_test', 'x', 'dr_test@example.com', 'doctor'))
+    Scheduler().set_availability(db, doctor_id, WHOLE_WEEK)
+    return doctor_id
+
+
+@pytest.fixture
+def patient(db):
+    return db.execute("SELECT id FROM users WHERE username = 'patient1'").fetchone()['id']
+
+
+def _tomorrow_at(hour, minute=0):
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def test_double_booking_is_rejected_and_adjacent_slot_accepted(db, doctor, patient):
+    scheduler = Scheduler()
+    start = _tomorrow_at(10)
+    _, booked_start, booked_end = scheduler.book(db, patient, doctor, start, 'checkup')
+    assert booked_end - booked_start == timedelta(minutes=30)
+
+    # /schedule_appointment turns SlotUnavailable into a 409 carrying next_slot
+    with pytest.raises(SlotUnavailable) as excinfo:
+        scheduler.book(db, patient, doctor, start, 'checkup')
+    assert excinfo.value.next_slot == booked_end
+
+    scheduler.book(db, patient, doctor, booked_end, 'checkup')
+    scheduler.book(db, patient, doctor, start - timedelta(minutes=30), 'checkup')
+    assert scheduler.next_free_slot(db, doctor, start) == start + timedelta(minutes=60)
+
+
+def test_off_grid_and_past_slots_are_rejected(db, doctor, patient):
+    scheduler = Scheduler()
+    with pytest.raises(SlotUnavailable):
+        scheduler.book(db, patient, doctor, _tomorrow_at(10, 15), 'checkup')
+    with pytest.raises(SlotUnavailable):
+        scheduler.book(db, patient, doctor, _tomorrow_at(20), 'checkup')
+    with pytest.raises(SlotUnavailable):
+        scheduler.book(db, patient, doctor, _tomorrow_at(10) - timedelta(days=3), 'checkup')
+
+
+def test_rejected_appointment_frees_its_slot(db, doctor, patient):
+    scheduler = Scheduler()
+    start = _tomorrow_at(11)
+    appointment_id, _, _ = scheduler.book(db, patient, doctor, start, 'checkup')
+
+    db.execute("UPDATE appointments SET status = 'rejected' WHERE id = ?", (appointment_id,))
+    db.commit()
+    scheduler.release(doctor, start)
+
+    # Neither the in-memory index nor the partial unique index still holds the slot
+    assert scheduler.next_free_slot(db, doctor, start - timedelta(minutes=1)) == start
+    scheduler.book(db, patient, doctor, start, 'checkup')
+
+
+def test_stale_scheduler_is_stopped_by_unique_index(db, backend, doctor, patient):
+    stale = Scheduler()
+    start = _tomorrow_at(12)
+    assert stale.next_free_slot(db, doctor, start - timedelta(minutes=1)) == start  # Calendar now cached
+
+    # Another worker books the slot through its own scheduler and connection
+    other_db = backend.connect()
+    try:
+        Scheduler().book(other_db, patient, doctor, start, 'checkup')
+    finally:
+        other_db.close()
+
+    with pytest.raises(SlotUnavailable) as excinfo:
+        stale.book(db, patient, doctor, start, 'checkup')
+    # The losing worker reloaded its calendar, so it no longer offers the taken slot
+    assert excinfo.value.next_slot == start + timedelta(minutes=30)
+    count = db.execute('SELECT COUNT(*) FROM appointments WHERE doctor_id = ? AND start_time = ?',
+                       (doctor, start.strftime('%Y-%m-%d %H:%M:%S'))).fetchone()[0]
+    assert count == 1
+
+
+def test_offset_aware_times_match_local_slots(db, doctor, patient):
+    scheduler = Scheduler()
+    start = _tomorrow_at(13)
+    aware = start.astimezone().astimezone(timezone(timedelta(hours=5, minutes=30)))
+    _, booked_start, _ = scheduler.book(db, patient, doctor, aware, 'checkup')
+    assert booked_start == start and booked_start.tzinfo is None
+    with pytest.raises(SlotUnavailable):
+        scheduler.book(db, patient, doctor, start, 'checkup')
+    assert scheduler.next_free_slot(db, doctor, aware - timedelta(minutes=1)) == start + timedelta(minutes=30)
+
+
+def test_concurrent_bookings_never_double_book(backend, db, doctor, patient):
+    slots = [_tomorrow_at(8) + timedelta(minutes=30 * i) for i in range(5)]
+    schedulers = [Scheduler(), Scheduler()]  # Two workers with separate in-memory calendars
+    booked, rejected = [], []
+
+    def attempt(scheduler):
+        conn = backend.connect()
+        try:
+            for start in slots:
+                try:
+                    scheduler.book(conn, patient, doctor, start, 'checkup')
+                    booked.append(start)
+                except SlotUnavailable:
+                    rejected.append(start)
+                except Exception:  # SQLite may report a busy writer; that attempt simply fails
+                    conn.rollback()
+                    rejected.append(start)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=attempt, args=(schedulers[i % 2],)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(booked) == len(set(booked)) <= len(slots)
+    assert len(booked) + len(rejected) == 6 * len(slots)
+    rows = db.execute('SELECT start_time FROM appointments WHERE doctor_id = ?', (doctor,)).fetchall()
+    assert len(rows) == len(booked)
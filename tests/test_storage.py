@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifications import _overdue_checkups, notify_many, unread_count
+from retention import RETENTION_POLICIES
+from storage import PREPARED_QUERIES, _to_format_paramstyle, _to_numbered_params
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ('SELECT * FROM users WHERE id = ?', 'SELECT * FROM users WHERE id = %s'),
+    ('SELECT ? , ?', 'SELECT %s , %s'),
+    ("SELECT * FROM users WHERE username LIKE 'a%' AND id = ?",
+     "SELECT * FROM users WHERE username LIKE 'a%%' AND id = %s"),
+    ("SELECT 'what?' WHERE id = ?", "SELECT 'what?' WHERE id = %s"),
+    ("SELECT 'it''s ?' , ?", "SELECT 'it''s ?' , %s"),
+    ('SELECT 100 % 7', 'SELECT 100 %% 7'),
+])
+def test_format_paramstyle(sql, expected):
+    assert _to_format_paramstyle(sql) == expected
+
+
+def test_numbered_params_skip_string_literals():
+    assert _to_numbered_params("SELECT '?' , ? , ?") == "SELECT '?' , $1 , $2"
+
+
+def _add_patient(db, username):
+    return db.insert('INSERT INTO users (username, password, email, user_type) VALUES (?, ?, ?, ?)',
+                     (username, 'x', f'{username}@example.com', 'patient'))
+
+
+def test_insert_returns_id(db):
+    first = _add_patient(db, 'alice')
+    second = _add_patient(db, 'bob')
+    assert second > first
+    assert db.execute('SELECT username FROM users WHERE id = ?', (second,)).fetchone()['username'] == 'bob'
+
+
+def test_execute_prepared(db):
+    user_id = _add_patient(db, 'alice')
+    now = datetime.now()
+    for days_ago, score in ((3, 10), (2, 20), (1, 30)):
+        db.execute('''
+            INSERT INTO assessments (user_id, risk_score, risk_level, wellness_score, wellness_level,
+                                     assessment_data, causal_analysis, created_at)
+            VALUES (?, ?, 'Low Risk', 80, 'Good', '{}', '{}', ?)
+        ''', (user_id, score, now - timedelta(days=days_ago)))
+    db.executemany('INSERT INTO mood_logs (user_id, mood, notes, timestamp) VALUES (?, ?, ?, ?)',
+                   [(user_id, 'Happy', 'walk', now), (user_id, 'Happy', '50% better', now),
+                    (user_id, 'Sad', None, now - timedelta(days=40))])
+    db.commit()
+
+    assert db.execute_prepared('user_by_username', ('alice',)).fetchone()['id'] == user_id
+    # Second run reuses the statement prepared on this connection
+    assert db.execute_prepared('user_by_username', ('nobody',)).fetchone() is None
+
+    recent = db.execute_prepared('recent_assessments', (user_id, 2)).fetchall()
+    assert [row['risk_score'] for row in recent] == [30, 20]
+
+    trends = db.execute_prepared('mood_trends', (user_id, now - timedelta(days=30))).fetchall()
+    assert [(row['mood'], row['count']) for row in trends] == [('Happy', 2)]
+
+    moods = db.execute_prepared('recent_moods', (user_id, 7)).fetchall()
+    assert sorted(row['notes'] or '' for row in moods) == ['', '50% better', 'walk']
+
+
+def test_prepared_statements_survive_connection_reuse(backend):
+    # A pooled connection keeps its prepared statements after being returned and checked out again
+    for _ in range(3):
+        db = backend.connect()
+        try:
+            for name in PREPARED_QUERIES:
+                params = {'user_by_username': ('admin',), 'mood_trends': (1, datetime.now())}.get(name, (1, 5))
+                db.execute_prepared(name, params).fetchall()
+        finally:
+            db.close()
+
+
+def test_notification_upserts(db):
+    alice = _add_patient(db, 'alice')
+    bob = _add_patient(db, 'bob')
+    events = [(alice, 'checkup', 'Check-up due', 'medium', 'checkup:2026-W01'),
+              (alice, 'risk', 'High risk', 'high', None),
+              (bob, 'checkup', 'Check-up due', 'medium', 'checkup:2026-W01')]
+    assert notify_many(db, events) == 3
+    # Keyed reminders are not repeated; unkeyed events always are
+    assert notify_many(db, events) == 1
+    db.commit()
+
+    assert unread_count(db, alice) == 3
+    assert unread_count(db, bob) == 1
+
+
+def test_retention_aggregate_upserts(db):
+    user_id = _add_patient(db, 'alice')
+    for table, (_, _, upsert) in RETENTION_POLICIES.items():
+        if table == 'chatbot_conversations':
+            rows = [(user_id, '2026-01-01', 2), (user_id, '2026-01-01', 3), (user_id, '2026-01-02', 1)]
+        else:
+            rows = [(user_id, '2026-01-01', 'Happy', 2), (user_id, '2026-01-01', 'Happy', 3),
+                    (user_id, '2026-01-02', 'Happy', 1)]
+        db.executemany(upsert, rows)
+    db.commit()
+
+    mood = db.execute('SELECT day, count FROM mood_daily ORDER BY day').fetchall()
+    assert [(str(row['day']), row['count']) for row in mood] == [('2026-01-01', 5), ('2026-01-02', 1)]
+    emergency = db.execute('SELECT count FROM emergency_daily ORDER BY day').fetchall()
+    assert [row['count'] for row in emergency] == [5, 1]
+    chat = db.execute('SELECT messages FROM chatbot_daily ORDER BY day').fetchall()
+    assert [row['messages'] for row in chat] == [5, 1]
+
+
+def test_overdue_checkups_skip_new_patients(db):
+    now = datetime(2026, 6, 1, 12, 0)
+    old = _add_patient(db, 'old_no_assessment')
+    new = _add_patient(db, 'new_no_assessment')
+    stale = _add_patient(db, 'stale_assessment')
+    recent = _add_patient(db, 'recent_assessment')
+    signed_up = {old: now - timedelta(days=90), new: now - timedelta(days=2),
+                 stale: now - timedelta(days=90), recent: now - timedelta(days=90)}
+    for user_id, created_at in signed_up.items():
+        db.execute('UPDATE users SET created_at = ? WHERE id = ?', (created_at, user_id))
+    for user_id, days_ago in ((stale, 45), (recent, 5)):
+        db.execute('''
+            INSERT INTO assessments (user_id, risk_score, risk_level, wellness_score, wellness_level,
+                                     assessment_data, causal_analysis, created_at)
+            VALUES (?, 10, 'Low Risk', 10, 'Good', '{}', '{}', ?)
+        ''', (user_id, now - timedelta(days=days_ago)))
+    db.commit()
+
+    due = {event[0] for batch in _overdue_checkups(db, now, 2) for event in batch}
+    assert due & set(signed_up) == {old, stale}
@@ -0,0 +1,136 @@
+# Offline translation from pre-translated phrase tables
+# Every string the app emits from a fixed set (page labels, risk/wellness
+# levels, causal analysis templates, alert messages) has a translation in
+# translations/<lang>.json. Tables are loaded once into dictionaries; strings
+# built from templates are matched back to their template, and those lookups
+# are kept in an LRU cache.
+
+import json
+import os
+import re
+from functools import lru_cache
+
+TRANSLATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations')
+TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', 4096))
+SOURCE_LANGUAGE = 'en'
+
+_PLACEHOLDER = re.compile(r'\\\{(\w+)\\\}')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+
+class UnsupportedLanguage(ValueError):
+    pass
+
+
+def _compile_template(template):
+    """Regex that matches a formatted template and captures its placeholder values"""
+    return re.compile(_PLACEHOLDER.sub(lambda m: f'(?P<{m.group(1)}>.+?)', re.escape(template)) + r'\Z')
+
+
+class PhraseTranslator:
+    """In-memory phrase tables with template matching for formatted strings"""
+
+    def __init__(self, directory=TRANSLATIONS_DIR, cache_size=TRANSLATION_CACHE_SIZE):
+        self.phrases = {}    # lang -> {english: translation}
+        self.templates = {}  # lang -> [(compiled english template, translated template)]
+        self.names = {SOURCE_LANGUAGE: 'English'}
+
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                table = json.load(f)
+            lang = table['language']
+            self.names[lang] = table.get('name', lang)
+            self.phrases[lang] = table['phrases']
+            self.templates[lang] = [(_compile_template(source), target)
+                                    for source, target in table['phrases'].items() if '{' in source]
+
+        self._lookup_dynamic = lru_cache(maxsize=cache_size)(self._lookup_dynamic_uncached)
+
+    @property
+    def languages(self):
+        return dict(self.names)
+
+    def _check(self, lang):
+        if lang != SOURCE_LANGUAGE and lang not in self.phrases:
+            raise UnsupportedLanguage(f'Unsupported language: {lang}')
+
+    def _lookup_template(self, text, lang):
+        phrases = self.phrases[lang]
+        for pattern, target in self.templates[lang]:
+            match = pattern.match(text)
+            if match:
+                values = {name: phrases.get(value, value) for name, value in match.groupdict().items()}
+                return target.format(**values)
+        return None
+
+    def _lookup_dynamic_uncached(self, text, lang):
+        """Translate text that is not a table key: templates first, then sentence by sentence"""
+        translated = self._lookup_template(text, lang)
+        if translated is not None:
+            return translated
+
+        sentences = _SENTENCE_BREAK.split(text)
+        if len(sentences) < 2:
+            return None
+        phrases = self.phrases[lang]
+        parts = []
+        for sentence in sentences:
+            part = phrases.get(sentence) or self._lookup_template(sentence, lang)
+            if part is None:
+                return None
+            parts.append(part)
+        return ' '.join(parts)
+
+    def translate(self, text, lang):
+        """Return (translation, found); text without a translation comes back unchanged"""
+        self._check(lang)
+        if not isinstance(text, str):
+            return text, False
+        if lang == SOURCE_LANGUAGE or not text or not text.strip():
+            return text, True
+
+        translated = self.phrases[lang].get(text)
+        if translated is None:
+            # Page text arrives with its surrounding whitespace and line breaks
+            key = ' '.join(text.split())
+            translated = self.phrases[lang].get(key) or self._lookup_dynamic(key, lang)
+        if translated is None:
+            return text, False
+        return translated, True
+
+    def translate_many(self, texts, lang):
+        """Translate a list of strings; returns (translations, untranslated originals)"""
+        translations, missing = [], []
+        for text in texts:
+            translated, found = self.translate(text, lang)
+            translations.append(translated)
+            if not found:
+                missing.append(text)
+        return translations, missing
+
+    def translate_assessment(self, result, lang):
+        """Translate the user-facing strings of a calculate_risk / predictive_alerts response"""
+        self._check(lang)
+        result = dict(result)
+        missing = []
+
+        def tr(text):
+            translated, found = self.translate(text, lang)
+            if not found:
+                missing.append(text)
+            return translated
+
+        for key in ('risk_level', 'wellness_level', 'timeframe', 'urgency'):
+            if isinstance(result.get(key), str):
+                result[key] = tr(result[key])
+        if isinstance(result.get('causal_analysis'), list):
+            result['causal_analysis'] = [tr(line) for line in result['causal_analysis']]
+        if isinstance(result.get('alerts'), list):
+            result['alerts'] = [
+                dict(alert, **{key: tr(alert[key]) for key in ('message', 'recommendation', 'urgency') if key in alert})
+                if isinstance(alert, dict) else alert
+                for alert in result['alerts']
+            ]
+        return result, missing